@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, TypeVar
+import asyncio
 import logging
+import json
 
 from app.models import (
     ChatRequest,
     ChatResponse,
     CorrectionRequest,
     CorrectionResponse,
+    BatchCorrectionRequest,
+    BatchCorrectionItem,
+    BatchCorrectionResponse,
     HealthResponse,
     ErrorResponse
 )
-from app.services import Phi3Service
+from app.services import (
+    Phi3Service,
+    SchedulerError,
+    QueueFullError,
+    BackendUnavailableError
+)
 from app.core import get_settings
 
 logger = logging.getLogger(__name__)
@@ -27,9 +38,32 @@ def get_phi3_service() -> Phi3Service:
     return phi3_service
 
 
+# Failures that mean "try again later" rather than a broken request
+OVERLOAD_ERRORS = (SchedulerError, BackendUnavailableError)
+
+# Non-standard status (nginx convention) for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the response was ready"""
+
+
+def _overloaded(e: Exception) -> HTTPException:
+    """Map an overload failure to 429 (queue full) or 503 (no capacity in time)"""
+    return HTTPException(
+        status_code=429 if isinstance(e, QueueFullError) else 503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
+    http_request: Request,
     service: Phi3Service = Depends(get_phi3_service)
 ):
     """
@@ -45,20 +79,27 @@ async def chat(
         max_tokens = request.max_tokens if request.max_tokens is not None else settings.max_new_tokens
         
         # Generate response
-        response, conversation_id = service.chat(
+        response, conversation_id, usage = await _cancel_on_disconnect(http_request, service.chat(
             message=request.message,
             conversation_id=request.conversation_id,
             system_prompt=request.system_prompt,
             temperature=temperature,
             max_tokens=max_tokens
-        )
+        ))
         
         return ChatResponse(
             response=response,
             conversation_id=conversation_id,
-            tokens_used=None  # Could calculate this if needed
+            tokens_used=usage["total_tokens"] if usage else None,
+            usage=usage
         )
         
+    except ClientDisconnected:
+        logger.info("Client disconnected, chat generation cancelled")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except OVERLOAD_ERRORS as e:
+        logger.warning(f"Chat rejected: {e}")
+        raise _overloaded(e)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -67,9 +108,99 @@ async def chat(
         raise HTTPException(status_code=500, detail="Chat failed")
 
 
+async def _cancel_on_disconnect(http_request: Request, work: Awaitable[T]) -> T:
+    """
+    Await work, cancelling it as soon as the client disconnects
+    
+    Cancelling the service call closes its Ollama connection, which makes
+    Ollama stop generating and frees the parallel slot.
+    
+    Raises:
+        ClientDisconnected: If the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    interval = get_settings().disconnect_poll_interval
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _format_event(chunk: Dict[str, Any], sse: bool) -> str:
+    """Serialize a stream chunk as an SSE event or an NDJSON line"""
+    data = json.dumps(chunk, ensure_ascii=False)
+    if sse:
+        return f"data: {data}\n\n"
+    return data + "\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    service: Phi3Service = Depends(get_phi3_service)
+):
+    """
+    Chat with the language model, streaming tokens as they are generated
+    
+    Responds with server-sent events when the client accepts
+    text/event-stream, otherwise with NDJSON (one chunk per line).
+    """
+    settings = get_settings()
+    temperature = request.temperature if request.temperature is not None else settings.temperature
+    max_tokens = request.max_tokens if request.max_tokens is not None else settings.max_new_tokens
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    chunks = service.chat_stream(
+        message=request.message,
+        conversation_id=request.conversation_id,
+        system_prompt=request.system_prompt,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    
+    # Wait for admission and the first chunk so rejections get a real status
+    try:
+        first_chunk = await chunks.__anext__()
+    except OVERLOAD_ERRORS as e:
+        logger.warning(f"Chat stream rejected: {e}")
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        raise HTTPException(status_code=500, detail="Chat failed")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            yield _format_event(first_chunk, sse)
+            async for chunk in chunks:
+                yield _format_event(chunk, sse)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error(f"Chat stream error: {e}")
+            yield _format_event({"error": "Chat failed", "done": True}, sse)
+        finally:
+            # Runs when the client disconnects too; closes the Ollama stream
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/correct", response_model=CorrectionResponse)
 async def correct_text(
     request: CorrectionRequest,
+    http_request: Request,
     service: Phi3Service = Depends(get_phi3_service)
 ):
     """
@@ -78,14 +209,21 @@ async def correct_text(
     Provides corrections and explanations for language learning.
     """
     try:
-        result = service.correct_text(
+        result = await _cancel_on_disconnect(http_request, service.correct_text(
             text=request.text,
             target_language=request.target_language,
-            provide_explanation=request.provide_explanation
-        )
+            provide_explanation=request.provide_explanation,
+            include_corrections=request.include_corrections
+        ))
         
         return CorrectionResponse(**result)
         
+    except ClientDisconnected:
+        logger.info("Client disconnected, correction cancelled")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except OVERLOAD_ERRORS as e:
+        logger.warning(f"Correction rejected: {e}")
+        raise _overloaded(e)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -94,6 +232,59 @@ async def correct_text(
         raise HTTPException(status_code=500, detail="Correction failed")
 
 
+@router.post("/correct/batch", response_model=BatchCorrectionResponse)
+async def correct_batch(
+    request: BatchCorrectionRequest,
+    http_request: Request,
+    service: Phi3Service = Depends(get_phi3_service)
+):
+    """
+    Correct several texts in one call
+    
+    Items are processed with bounded parallelism; results are returned in
+    input order and a failing item does not fail the whole batch.
+    """
+    settings = get_settings()
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items. Max batch size: {settings.batch_max_items}"
+        )
+    
+    try:
+        outcomes = await _cancel_on_disconnect(http_request, service.correct_batch(
+            [
+                {
+                    "text": item.text,
+                    "target_language": item.target_language,
+                    "provide_explanation": item.provide_explanation,
+                    "include_corrections": item.include_corrections
+                }
+                for item in request.items
+            ],
+            concurrency=settings.batch_concurrency
+        ))
+    except ClientDisconnected:
+        logger.info("Client disconnected, batch correction cancelled")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    
+    results = [
+        BatchCorrectionItem(
+            index=i,
+            result=CorrectionResponse(**outcome["result"]) if outcome["result"] else None,
+            error=outcome["error"]
+        )
+        for i, outcome in enumerate(outcomes)
+    ]
+    failed = sum(1 for item in results if item.error)
+    
+    return BatchCorrectionResponse(
+        results=results,
+        succeeded=len(results) - failed,
+        failed=failed
+    )
+
+
 @router.delete("/conversation/{conversation_id}")
 async def clear_conversation(
     conversation_id: str,
@@ -103,7 +294,7 @@ async def clear_conversation(
     Clear a conversation history
     """
     try:
-        service.clear_conversation(conversation_id)
+        await service.clear_conversation(conversation_id)
         return {"message": "Conversation cleared", "conversation_id": conversation_id}
     except Exception as e:
         logger.error(f"Error clearing conversation: {e}")
@@ -125,6 +316,14 @@ async def health_check(service: Phi3Service = Depends(get_phi3_service)):
     )
 
 
+@router.get("/metrics")
+async def get_metrics(service: Phi3Service = Depends(get_phi3_service)):
+    """
+    Get token usage, generation speed and latency aggregates
+    """
+    return service.get_usage_metrics()
+
+
 @router.get("/info")
 async def get_info(service: Phi3Service = Depends(get_phi3_service)):
     """
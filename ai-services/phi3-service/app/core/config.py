@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List
 
 
 class Settings(BaseSettings):
@@ -13,18 +14,91 @@ class Settings(BaseSettings):
     # Ollama Configuration
     ollama_base_url: str = "http://localhost:11434"
     model_name: str = "phi3"
+    ollama_timeout: float = 120.0
+    ollama_base_urls: str = ""  # comma-separated list, overrides ollama_base_url
+    ollama_failure_threshold: int = 3
+    ollama_circuit_reset_seconds: float = 30.0
+    ollama_probe_interval: float = 10.0  # background health poll, also feeds /health and /info
+    
+    # Model Warm-Pinning
+    ollama_keep_alive: str = "30m"  # duration string, or -1 to keep loaded forever
+    preload_model: bool = True
+    keep_warm_interval: float = 240.0  # seconds, 0 disables
+    
+    # Ollama Connection Pool
+    ollama_max_connections: int = 20
+    ollama_max_keepalive_connections: int = 10
+    ollama_keepalive_expiry: float = 30.0
     
     # Generation Parameters
     max_new_tokens: int = 512
     temperature: float = 0.7
     top_p: float = 0.9
+    correction_json_mode: bool = True
+    
+    # Model Routing (empty small_model_name disables routing)
+    small_model_name: str = ""
+    routing_correction_max_tokens: int = 32  # longest correction input for the small model
+    routing_chat_max_tokens: int = 0  # longest chat message for the small model, 0 = never
     
     # Performance
-    max_conversation_history: int = 10
+    max_conversation_history: int = 0  # optional hard cap on turns, 0 = token budget only
+    max_prompt_tokens: int = 3072
+    context_window: int = 4096
+    batch_max_items: int = 50
+    batch_concurrency: int = 4
+    
+    # Conversation Compaction
+    compaction_enabled: bool = False
+    compaction_threshold_tokens: int = 2048
+    compaction_keep_recent: int = 6
+    
+    # Admission Scheduler
+    scheduler_max_concurrent: int = 2  # per backend, match OLLAMA_NUM_PARALLEL
+    scheduler_max_queue: int = 64
+    scheduler_deadline_interactive: float = 15.0
+    scheduler_deadline_correction: float = 30.0
+    scheduler_deadline_batch: float = 120.0
+    
+    # Usage Metrics
+    metrics_latency_window: int = 1000  # recent requests used for p50/p95
+    
+    # Seconds between client disconnect checks while a generation runs
+    disconnect_poll_interval: float = 0.5
+    
+    # Conversation Store
+    conversation_backend: str = "memory"  # memory, sqlite or redis
+    conversation_sqlite_path: str = "data/conversations.db"
+    conversation_redis_url: str = "redis://localhost:6379/0"
+    conversation_redis_prefix: str = "phi3:conversation:"
+    conversation_max_entries: int = 1000
+    conversation_ttl_seconds: float = 3600.0
+    conversation_sweep_interval: float = 60.0
+    
+    # Correction Cache
+    correction_cache_enabled: bool = True
+    correction_cache_max_entries: int = 2048
+    correction_cache_ttl_seconds: float = 86400.0
+    correction_cache_disk_path: str = ""  # empty disables the disk tier
+    correction_cache_disk_max_entries: int = 100000
+    correction_cache_sweep_interval: float = 600.0
+    
+    # Semantic Cache (near-duplicate /correct and first-turn chat; requires numpy)
+    semantic_cache_enabled: bool = False
+    embedding_model: str = "nomic-embed-text"
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_max_entries: int = 2048
+    semantic_cache_ttl_seconds: float = 86400.0
+    semantic_cache_strict: bool = True  # chat hits also need the same content words
     
     # Logging
     log_level: str = "INFO"
     
+    def get_ollama_base_urls(self) -> List[str]:
+        """Get the configured Ollama backend URLs"""
+        urls = [url.strip() for url in self.ollama_base_urls.split(",") if url.strip()]
+        return urls or [self.ollama_base_url]
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
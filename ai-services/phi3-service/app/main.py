@@ -5,7 +5,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core import get_settings
 from app.api import router
-from app.services import Phi3Service
+from app.services import create_phi3_service
 import app.api.routes as routes_module
 
 # Configure logging
@@ -25,11 +25,8 @@ async def lifespan(app: FastAPI):
     
     try:
         # Initialize Phi3 service with Ollama
-        routes_module.phi3_service = Phi3Service(
-            ollama_base_url=settings.ollama_base_url,
-            model_name=settings.model_name,
-            max_history=settings.max_conversation_history
-        )
+        routes_module.phi3_service = create_phi3_service(settings)
+        await routes_module.phi3_service.start()
         logger.info("Phi3 service initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Phi3 service: {e}")
@@ -39,6 +36,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Phi3 service...")
+    if routes_module.phi3_service is not None:
+        await routes_module.phi3_service.close()
 
 
 # Create FastAPI application
@@ -3,9 +3,13 @@ from .schemas import (
     MessageRole,
     ChatRequest,
     ChatResponse,
+    TokenUsage,
     ConversationHistory,
     CorrectionRequest,
     CorrectionResponse,
+    BatchCorrectionRequest,
+    BatchCorrectionItem,
+    BatchCorrectionResponse,
     HealthResponse,
     ErrorResponse
 )
@@ -15,9 +19,13 @@ __all__ = [
     "MessageRole",
     "ChatRequest",
     "ChatResponse",
+    "TokenUsage",
     "ConversationHistory",
     "CorrectionRequest",
     "CorrectionResponse",
+    "BatchCorrectionRequest",
+    "BatchCorrectionItem",
+    "BatchCorrectionResponse",
     "HealthResponse",
     "ErrorResponse"
 ]
@@ -32,12 +32,26 @@ class ChatRequest(BaseModel):
         return v.strip()
 
 
+class TokenUsage(BaseModel):
+    """Token counts and timings reported by Ollama for one generation"""
+    
+    prompt_tokens: int = Field(..., description="Prompt tokens evaluated (excludes Ollama's prompt cache)")
+    completion_tokens: int = Field(..., description="Tokens generated")
+    total_tokens: int = Field(..., description="Prompt plus generated tokens")
+    prompt_eval_ms: float = Field(..., description="Time spent evaluating the prompt")
+    eval_ms: float = Field(..., description="Time spent generating tokens")
+    load_ms: float = Field(..., description="Time spent loading the model")
+    total_ms: float = Field(..., description="Total time reported by Ollama")
+    tokens_per_second: Optional[float] = Field(None, description="Generation speed")
+
+
 class ChatResponse(BaseModel):
     """Chat response model"""
     
     response: str = Field(..., description="Assistant's response")
     conversation_id: str = Field(..., description="Conversation ID")
     tokens_used: Optional[int] = Field(None, description="Number of tokens used")
+    usage: Optional[TokenUsage] = Field(None, description="Token usage and timings")
 
 
 class ConversationHistory(BaseModel):
@@ -55,6 +69,7 @@ class CorrectionRequest(BaseModel):
     text: str = Field(..., description="Text to correct", max_length=1000)
     target_language: str = Field("en", description="Target language code")
     provide_explanation: bool = Field(True, description="Provide explanation for corrections")
+    include_corrections: bool = Field(True, description="List the individual corrections made")
 
 
 class CorrectionResponse(BaseModel):
@@ -64,6 +79,37 @@ class CorrectionResponse(BaseModel):
     corrected_text: str = Field(..., description="Corrected text")
     corrections: List[Dict[str, str]] = Field(..., description="List of corrections made")
     explanation: Optional[str] = Field(None, description="Explanation of corrections")
+    parse_mode: Optional[str] = Field(
+        None,
+        description="Output protocol that produced the result: json, text or fallback"
+    )
+    model: Optional[str] = Field(None, description="Model that produced the result")
+    usage: Optional[TokenUsage] = Field(
+        None,
+        description="Token usage and timings (empty when served from cache)"
+    )
+
+
+class BatchCorrectionRequest(BaseModel):
+    """Batch language correction request"""
+    
+    items: List[CorrectionRequest] = Field(..., description="Texts to correct", min_length=1)
+
+
+class BatchCorrectionItem(BaseModel):
+    """Result of one item in a batch correction"""
+    
+    index: int = Field(..., description="Position of the item in the request")
+    result: Optional[CorrectionResponse] = Field(None, description="Correction result")
+    error: Optional[str] = Field(None, description="Error message if the item failed")
+
+
+class BatchCorrectionResponse(BaseModel):
+    """Batch language correction response"""
+    
+    results: List[BatchCorrectionItem] = Field(..., description="Per-item results in input order")
+    succeeded: int = Field(..., description="Number of successful items")
+    failed: int = Field(..., description="Number of failed items")
 
 
 class HealthResponse(BaseModel):
@@ -1,3 +1,44 @@
-from .phi3_service import Phi3Service
+from .phi3_service import Phi3Service, create_phi3_service
+from .conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    RedisConversationStore,
+    create_conversation_store
+)
+from .correction_cache import CorrectionCache
+from .single_flight import SingleFlight
+from .scheduler import (
+    AdmissionScheduler,
+    Priority,
+    SchedulerError,
+    QueueFullError,
+    QueueTimeoutError
+)
+from .backend_pool import BackendPool, OllamaBackend, BackendUnavailableError
+from .usage_metrics import UsageMetrics
+from .model_router import ModelRouter
+from .semantic_cache import SemanticCache
 
-__all__ = ["Phi3Service"]
+__all__ = [
+    "Phi3Service",
+    "create_phi3_service",
+    "ConversationStore",
+    "InMemoryConversationStore",
+    "SQLiteConversationStore",
+    "RedisConversationStore",
+    "create_conversation_store",
+    "CorrectionCache",
+    "SingleFlight",
+    "AdmissionScheduler",
+    "Priority",
+    "SchedulerError",
+    "QueueFullError",
+    "QueueTimeoutError",
+    "BackendPool",
+    "OllamaBackend",
+    "BackendUnavailableError",
+    "UsageMetrics",
+    "ModelRouter",
+    "SemanticCache"
+]
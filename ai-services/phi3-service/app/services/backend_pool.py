@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUnavailableError(Exception):
+    """Raised when no Ollama backend can take a request"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OllamaBackend:
+    """State of a single Ollama endpoint"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.circuit_open_until = 0.0
+        # Whether the single trial request of a half-open circuit is running
+        self.trial_in_flight = False
+        self.requests = 0
+        self.failures = 0
+        # Cached results of the last health probe
+        self.last_probe_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.models: List[str] = []
+        # Models currently loaded in memory -> unload time reported by Ollama
+        self.loaded_models: Dict[str, str] = {}
+        self.warmed_at: Optional[float] = None
+
+    def is_available(self, now: float) -> bool:
+        """Whether requests may be routed here (closed, or half-open with no trial running)"""
+        if not self.healthy or now < self.circuit_open_until:
+            return False
+        return not (self.circuit_open_until and self.trial_in_flight)
+
+    def circuit_state(self, now: float) -> str:
+        if now < self.circuit_open_until:
+            return "open"
+        if self.circuit_open_until:
+            return "half_open"
+        return "closed"
+
+
+class BackendPool:
+    """
+    Routes requests across several Ollama endpoints
+
+    Picks the available backend with the fewest outstanding requests, keeps
+    a conversation on the same backend while it is available (so its prompt
+    cache stays warm), and opens a circuit on backends that keep failing.
+    Once the reset time has passed, a single trial request decides whether
+    the circuit closes again. Health probes only track reachability; they
+    never close a circuit opened by failing requests.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        client: httpx.AsyncClient,
+        failure_threshold: int = 3,
+        circuit_reset_seconds: float = 30.0,
+        probe_interval: float = 10.0
+    ):
+        """
+        Initialize backend pool
+
+        Args:
+            urls: Ollama base URLs
+            client: Shared HTTP client
+            failure_threshold: Consecutive failures that open a backend's circuit
+            circuit_reset_seconds: Time before an open circuit allows a trial request
+            probe_interval: Seconds between background health probes
+        """
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required")
+
+        self.backends = [OllamaBackend(url) for url in urls]
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.circuit_reset_seconds = circuit_reset_seconds
+        self.probe_interval = probe_interval
+
+    @property
+    def primary(self) -> OllamaBackend:
+        return self.backends[0]
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    @staticmethod
+    def _affinity(key: str, backend: OllamaBackend) -> int:
+        # Rendezvous hashing: adding a node only moves the keys it wins
+        digest = hashlib.sha256(f"{key}|{backend.url}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def choose(
+        self,
+        sticky_key: Optional[str] = None,
+        exclude: Optional[List[OllamaBackend]] = None
+    ) -> OllamaBackend:
+        """
+        Pick a backend for a request
+
+        Args:
+            sticky_key: Key (e.g. conversation ID) that should stay on one backend
+            exclude: Backends to skip, e.g. after a failed attempt
+
+        Raises:
+            BackendUnavailableError: If every backend is unhealthy or open
+        """
+        now = time.monotonic()
+        candidates = [
+            b for b in self.backends
+            if b.is_available(now) and not (exclude and b in exclude)
+        ]
+        if not candidates:
+            reopen_at = min(b.circuit_open_until for b in self.backends)
+            retry_after = max(1, math.ceil(reopen_at - now)) if reopen_at > now else max(1, math.ceil(self.probe_interval))
+            raise BackendUnavailableError("No Ollama backend available", retry_after)
+
+        if sticky_key:
+            return max(candidates, key=lambda b: self._affinity(sticky_key, b))
+        return min(candidates, key=lambda b: b.outstanding)
+
+    def record_success(self, backend: OllamaBackend):
+        if backend.consecutive_failures or backend.circuit_open_until:
+            logger.info(f"Ollama backend {backend.url} recovered")
+        backend.consecutive_failures = 0
+        backend.circuit_open_until = 0.0
+
+    def record_failure(self, backend: OllamaBackend):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.failure_threshold:
+            backend.circuit_open_until = time.monotonic() + self.circuit_reset_seconds
+            logger.warning(
+                f"Opened circuit for Ollama backend {backend.url} "
+                f"after {backend.consecutive_failures} failures"
+            )
+
+    @staticmethod
+    def is_backend_failure(error: Exception) -> bool:
+        """Transport errors and 5xx responses count against a backend"""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        sticky_key: Optional[str] = None,
+        exclude: Optional[List[OllamaBackend]] = None
+    ) -> AsyncIterator[OllamaBackend]:
+        """
+        Route one request to a backend, tracking outstanding count and health
+
+        Args:
+            sticky_key: Key that should stay on one backend
+            exclude: Backends to skip
+        """
+        backend = self.choose(sticky_key, exclude)
+        trial = backend.circuit_state(time.monotonic()) == "half_open"
+        if trial:
+            backend.trial_in_flight = True
+            logger.info(f"Sending trial request to Ollama backend {backend.url}")
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        except Exception as e:
+            if self.is_backend_failure(e):
+                self.record_failure(backend)
+            raise
+        else:
+            self.record_success(backend)
+        finally:
+            backend.outstanding -= 1
+            if trial:
+                backend.trial_in_flight = False
+
+    async def probe(self, backend: OllamaBackend) -> bool:
+        """Check one backend and cache its health, latency and model list"""
+        started = time.monotonic()
+        try:
+            response = await self.client.get(f"{backend.url}/api/tags", timeout=5.0)
+            healthy = response.status_code == 200
+            if healthy:
+                backend.models = [m['name'] for m in response.json().get('models', [])]
+                ps = await self.client.get(f"{backend.url}/api/ps", timeout=5.0)
+                if ps.status_code == 200:
+                    backend.loaded_models = {
+                        m['name']: m.get('expires_at', '')
+                        for m in ps.json().get('models', [])
+                    }
+        except Exception:
+            healthy = False
+
+        backend.last_probe_at = time.monotonic()
+        backend.latency_ms = round((backend.last_probe_at - started) * 1000, 2) if healthy else None
+
+        if healthy != backend.healthy:
+            logger.info(f"Ollama backend {backend.url} is now {'healthy' if healthy else 'unhealthy'}")
+        # Reachability only; the circuit is left to request outcomes
+        backend.healthy = healthy
+        return healthy
+
+    async def probe_all(self):
+        """Probe every backend concurrently"""
+        await asyncio.gather(*(self.probe(b) for b in self.backends))
+
+    async def run_prober(self):
+        """Probe backends now and then periodically until cancelled"""
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Backend probe failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+
+    def is_healthy(self) -> bool:
+        """Whether any backend passed its last probe"""
+        return any(b.healthy for b in self.backends)
+
+    def has_model(self, model_name: str) -> bool:
+        """Whether a healthy backend listed the model in its last probe"""
+        return any(
+            b.healthy and any(model_name in name for name in b.models)
+            for b in self.backends
+        )
+
+    def is_model_pinned(self, model_name: str) -> bool:
+        """Whether every healthy backend had the model loaded at its last probe"""
+        healthy = [b for b in self.backends if b.healthy]
+        return bool(healthy) and all(
+            any(model_name in name for name in b.loaded_models) for b in healthy
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Get per-backend routing and cached health state"""
+        now = time.monotonic()
+        return [
+            {
+                "url": b.url,
+                "healthy": b.healthy,
+                "circuit": b.circuit_state(now),
+                "outstanding": b.outstanding,
+                "requests": b.requests,
+                "failures": b.failures,
+                "latency_ms": b.latency_ms,
+                "models": b.models,
+                "loaded_models": b.loaded_models,
+                "warmed_seconds_ago": round(time.time() - b.warmed_at, 1) if b.warmed_at else None,
+                "checked_seconds_ago": round(now - b.last_probe_at, 1) if b.last_probe_at else None
+            }
+            for b in self.backends
+        ]
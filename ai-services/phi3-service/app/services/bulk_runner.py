@@ -0,0 +1,274 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, Optional, Set, Any, TextIO
+
+from app.services.scheduler import Priority, SchedulerError
+from app.services.backend_pool import BackendUnavailableError
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+class BulkCorrectionRunner:
+    """
+    Correct a JSONL file of texts with bounded concurrency and checkpoints
+
+    Input lines are read lazily and handed to a fixed pool of workers
+    through a bounded queue, so memory stays constant regardless of file
+    size. Each input line produces one output line. The checkpoint stores
+    the first input line that is not yet done (plus the few done lines
+    beyond it) and the output size at that moment; a resumed run truncates
+    the output back to that size and skips finished lines, so no row is
+    lost or written twice.
+    """
+
+    def __init__(
+        self,
+        service,
+        input_path: str,
+        output_path: str,
+        checkpoint_path: Optional[str] = None,
+        concurrency: int = 4,
+        retries: int = 2,
+        checkpoint_interval: float = 5.0,
+        report_interval: float = 10.0,
+        defaults: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize bulk runner
+
+        Args:
+            service: Started Phi3Service used for corrections
+            input_path: JSONL file with one {"text": ...} object per line
+            output_path: JSONL file receiving one result row per input line
+            checkpoint_path: Checkpoint file (defaults to output_path + ".ckpt")
+            concurrency: Number of corrections in flight
+            retries: Extra attempts for items rejected by overload protection
+            checkpoint_interval: Seconds between checkpoint writes
+            report_interval: Seconds between progress reports (0 disables)
+            defaults: Default correct_text() arguments for lines that omit them
+        """
+        self.service = service
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.checkpoint_interval = checkpoint_interval
+        self.report_interval = report_interval
+        self.defaults = {
+            "target_language": "en",
+            "provide_explanation": True,
+            "include_corrections": True,
+            **(defaults or {})
+        }
+
+        # First line that is not done, and where it starts in the input
+        self._watermark = 0
+        self._watermark_offset = 0
+        # Done lines beyond the watermark (at most queue size + concurrency)
+        self._done_ahead: Set[int] = set()
+        # Start offsets of read lines that are not below the watermark yet
+        self._offsets: Dict[int, int] = {}
+        self._next_line = 0
+        self._next_offset = 0
+
+        self.succeeded = 0
+        self.failed = 0
+        # Items finished by earlier runs of the same job
+        self._previously_done = 0
+        self._output: Optional[TextIO] = None
+        self._started = 0.0
+        self._last_checkpoint = 0.0
+
+    def _load_checkpoint(self) -> bool:
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("input") != os.path.abspath(self.input_path):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to {state.get('input')}, "
+                f"not {self.input_path}"
+            )
+
+        self._watermark = self._next_line = state["next_line"]
+        self._watermark_offset = self._next_offset = state["input_offset"]
+        self._done_ahead = set(state["done_ahead"])
+        self.succeeded = state["succeeded"]
+        self.failed = state["failed"]
+        self._previously_done = self.succeeded + self.failed
+
+        # Drop rows written after the checkpoint; they will be redone
+        with open(self.output_path, "r+b") as f:
+            f.truncate(state["output_offset"])
+        return True
+
+    def _write_checkpoint(self, completed: bool = False):
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "input": os.path.abspath(self.input_path),
+            "next_line": self._watermark,
+            "input_offset": self._watermark_offset,
+            "done_ahead": sorted(self._done_ahead),
+            "output_offset": self._output.tell(),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "completed": completed
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._last_checkpoint = time.monotonic()
+
+    def _mark_done(self, line_no: int):
+        self._done_ahead.add(line_no)
+        while self._watermark in self._done_ahead:
+            self._done_ahead.remove(self._watermark)
+            self._offsets.pop(self._watermark, None)
+            self._watermark += 1
+        self._watermark_offset = self._offsets.get(self._watermark, self._next_offset)
+
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self._write_checkpoint()
+
+    def _write_row(self, row: Dict[str, Any]):
+        self._output.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    async def _correct(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {
+            key: item.get(key, default)
+            for key, default in self.defaults.items()
+        }
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.service.correct_text(
+                    text=item["text"], priority=Priority.BATCH, **kwargs
+                )
+            except (SchedulerError, BackendUnavailableError) as e:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def _process(self, line_no: int, raw: bytes):
+        row: Dict[str, Any] = {"line": line_no}
+        try:
+            item = json.loads(raw)
+            if isinstance(item, dict) and "id" in item:
+                row["id"] = item["id"]
+            if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+                raise ValueError("Expected an object with a text field")
+            row["result"] = await self._correct(item)
+            self.succeeded += 1
+        except Exception as e:
+            row["error"] = str(e) or type(e).__name__
+            self.failed += 1
+            logger.warning(f"Line {line_no} failed: {row['error']}")
+        self._write_row(row)
+        self._mark_done(line_no)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            entry = await queue.get()
+            try:
+                if entry is None:
+                    return
+                await self._process(*entry)
+            finally:
+                queue.task_done()
+
+    async def _read_input(self, queue: asyncio.Queue):
+        with open(self.input_path, "rb") as f:
+            f.seek(self._next_offset)
+            while True:
+                offset = f.tell()
+                raw = f.readline()
+                if not raw:
+                    break
+                line_no = self._next_line
+                self._next_line += 1
+                self._next_offset = f.tell()
+
+                if line_no in self._done_ahead:
+                    self._mark_done(line_no)
+                    continue
+                if not raw.strip():
+                    self._mark_done(line_no)
+                    continue
+                self._offsets[line_no] = offset
+                await queue.put((line_no, raw))
+
+    def _report(self, final: bool = False):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        done = self.succeeded + self.failed - self._previously_done
+        usage = self.service.get_usage_metrics()["operations"].get("correction", {})
+        latency = usage.get("latency_ms", {})
+        print(
+            f"{'Finished' if final else 'Progress'}: "
+            f"{self.succeeded} ok, {self.failed} failed, {done} this run in {elapsed:.1f}s "
+            f"({done / elapsed:.2f} items/s, "
+            f"{usage.get('completion_tokens', 0) / elapsed:.1f} generated tokens/s, "
+            f"p50 {latency.get('p50')} ms, p95 {latency.get('p95')} ms)",
+            file=sys.stderr,
+            flush=True
+        )
+
+    async def _run_reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self._report()
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Process the input file, resuming from the checkpoint if one exists
+
+        Returns:
+            Summary with counts, elapsed time and throughput
+        """
+        resumed = self._load_checkpoint()
+        start_line = self._watermark
+        if resumed:
+            logger.info(f"Resuming {self.input_path} at line {start_line}")
+        self._output = open(self.output_path, "a" if resumed else "w", encoding="utf-8")
+        self._started = self._last_checkpoint = time.monotonic()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        reporter = asyncio.create_task(self._run_reporter()) if self.report_interval > 0 else None
+        completed = False
+        try:
+            await self._read_input(queue)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            completed = True
+        finally:
+            for task in workers + ([reporter] if reporter else []):
+                task.cancel()
+            await asyncio.gather(*workers, *([reporter] if reporter else []), return_exceptions=True)
+            # Interrupted runs keep a checkpoint of everything finished so far
+            self._write_checkpoint(completed=completed)
+            self._output.close()
+
+        self._report(final=True)
+        elapsed = time.monotonic() - self._started
+        processed = self.succeeded + self.failed - self._previously_done
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "processed_this_run": processed,
+            "resumed_from_line": start_line,
+            "elapsed_seconds": round(elapsed, 2),
+            "items_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+            "usage": self.service.get_usage_metrics()["operations"].get("correction")
+        }
@@ -0,0 +1,567 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Any
+
+try:
+    import redis
+except ImportError:  # Optional dependency, only needed for the Redis backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message overhead of the dict and its keys, in bytes
+MESSAGE_OVERHEAD_BYTES = 64
+
+
+def estimate_size(messages: List[Dict[str, str]]) -> int:
+    """Estimate the memory footprint of a conversation in bytes"""
+    return sum(
+        len(m.get("content", "").encode("utf-8")) + len(m.get("role", "")) + MESSAGE_OVERHEAD_BYTES
+        for m in messages
+    )
+
+
+class ConversationStore(ABC):
+    """
+    Interface for conversation history backends
+
+    The sync methods may block on I/O. Code running on the event loop uses
+    the a-prefixed variants, which move blocking backends' calls to a
+    worker thread.
+    """
+
+    sweep_interval: float = 60.0
+    # Whether the sync methods do network or disk I/O
+    blocking: bool = False
+    # Executor for blocking calls (None uses the loop's default executor)
+    _executor: Optional[Executor] = None
+
+    @abstractmethod
+    def get(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Get conversation messages and mark the conversation as recently used
+
+        Returns:
+            List of messages, or None if missing or expired
+        """
+
+    @abstractmethod
+    def set(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Store conversation messages"""
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> bool:
+        """Delete a conversation, returning whether it existed"""
+
+    @abstractmethod
+    def __contains__(self, conversation_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Get store occupancy and eviction counters"""
+
+    def sweep(self) -> int:
+        """
+        Remove expired conversations
+
+        Returns:
+            Number of conversations removed
+        """
+        return 0
+
+    async def _call(self, fn: Callable[..., Any], *args) -> Any:
+        if not self.blocking:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def aget(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """Async get(), safe to call from the event loop"""
+        return await self._call(self.get, conversation_id)
+
+    async def aset(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Async set(), safe to call from the event loop"""
+        await self._call(self.set, conversation_id, messages)
+
+    async def adelete(self, conversation_id: str) -> bool:
+        """Async delete(), safe to call from the event loop"""
+        return await self._call(self.delete, conversation_id)
+
+    async def run_sweeper(self):
+        """Remove expired conversations now and periodically until cancelled"""
+        while True:
+            try:
+                await self._call(self.sweep)
+            except Exception as e:
+                logger.error(f"Conversation sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def close(self):
+        """Release backend resources"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Bounded in-memory conversation store with LRU eviction and idle TTL"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600.0,
+        sweep_interval: float = 60.0
+    ):
+        """
+        Initialize conversation store
+
+        Args:
+            max_entries: Maximum number of conversations kept
+            ttl_seconds: Idle time after which a conversation expires (0 disables)
+            sweep_interval: Seconds between background expiry sweeps
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        # conversation_id -> (messages, size_bytes, last_access); oldest access first
+        self._entries: "OrderedDict[str, tuple[List[Dict[str, str]], int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_access > self.ttl_seconds
+
+    def _remove(self, conversation_id: str):
+        _, size, _ = self._entries.pop(conversation_id)
+        self._total_bytes -= size
+
+    def get(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Get conversation messages and mark the conversation as recently used
+
+        Returns:
+            List of messages, or None if missing or expired
+        """
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+
+        messages, size, last_access = entry
+        now = time.monotonic()
+        if self._is_expired(last_access, now):
+            self._remove(conversation_id)
+            self.expirations += 1
+            return None
+
+        self._entries[conversation_id] = (messages, size, now)
+        self._entries.move_to_end(conversation_id)
+        return messages
+
+    def set(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Store conversation messages, evicting the least recently used if full"""
+        if conversation_id in self._entries:
+            self._remove(conversation_id)
+
+        size = estimate_size(messages)
+        self._entries[conversation_id] = (messages, size, time.monotonic())
+        self._total_bytes += size
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+            logger.info(f"Evicted conversation: {oldest_id}")
+
+    def delete(self, conversation_id: str) -> bool:
+        """Delete a conversation, returning whether it existed"""
+        if conversation_id not in self._entries:
+            return False
+        self._remove(conversation_id)
+        return True
+
+    def __contains__(self, conversation_id: str) -> bool:
+        entry = self._entries.get(conversation_id)
+        return entry is not None and not self._is_expired(entry[2], time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def size_of(self, conversation_id: str) -> int:
+        """Get the estimated size of a conversation in bytes"""
+        entry = self._entries.get(conversation_id)
+        return entry[1] if entry else 0
+
+    def sweep(self) -> int:
+        """
+        Remove expired conversations
+
+        Returns:
+            Number of conversations removed
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+
+        now = time.monotonic()
+        removed = 0
+        # Entries are ordered by last access, so stop at the first live one
+        while self._entries:
+            oldest_id, (_, _, last_access) = next(iter(self._entries.items()))
+            if not self._is_expired(last_access, now):
+                break
+            self._remove(oldest_id)
+            removed += 1
+
+        self.expirations += removed
+        if removed:
+            logger.info(f"Expired {removed} idle conversations")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store occupancy and eviction counters"""
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "estimated_bytes": self._total_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite conversation store in WAL mode
+
+    Survives restarts and can be shared by several workers on one host.
+    Eviction uses the last access time stored alongside each conversation.
+    Queries run on a dedicated thread, so the connection is never used
+    concurrently. stats() returns a snapshot refreshed by each sweep.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str = "data/conversations.db",
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600.0,
+        sweep_interval: float = 60.0
+    ):
+        """
+        Initialize SQLite conversation store
+
+        Args:
+            path: Database file path
+            max_entries: Maximum number of conversations kept
+            ttl_seconds: Idle time after which a conversation expires (0 disables)
+            sweep_interval: Seconds between background expiry sweeps
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self.expirations = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode; every statement is its own short transaction
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id TEXT PRIMARY KEY, "
+            "messages TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversations_last_access "
+            "ON conversations (last_access)"
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-store")
+        self._stats = self._collect_stats()
+        logger.info(f"Using SQLite conversation store at {path}")
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds > 0 else float("-inf")
+
+    def get(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        row = self._conn.execute(
+            "SELECT messages, last_access FROM conversations WHERE id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        messages, last_access = row
+        if last_access < self._cutoff():
+            if self.delete(conversation_id):
+                self.expirations += 1
+            return None
+
+        self._conn.execute(
+            "UPDATE conversations SET last_access = ? WHERE id = ?",
+            (time.time(), conversation_id)
+        )
+        return json.loads(messages)
+
+    def set(self, conversation_id: str, messages: List[Dict[str, str]]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations (id, messages, size, last_access) "
+            "VALUES (?, ?, ?, ?)",
+            (conversation_id, json.dumps(messages), estimate_size(messages), time.time())
+        )
+
+        count = len(self)
+        if count > self.max_entries:
+            cursor = self._conn.execute(
+                "DELETE FROM conversations WHERE id IN ("
+                "SELECT id FROM conversations ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.evictions += cursor.rowcount
+            logger.info(f"Evicted {cursor.rowcount} conversations")
+
+    def delete(self, conversation_id: str) -> bool:
+        cursor = self._conn.execute(
+            "DELETE FROM conversations WHERE id = ?",
+            (conversation_id,)
+        )
+        return cursor.rowcount > 0
+
+    def __contains__(self, conversation_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM conversations WHERE id = ? AND last_access >= ?",
+            (conversation_id, self._cutoff())
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def size_of(self, conversation_id: str) -> int:
+        """Get the estimated size of a conversation in bytes"""
+        row = self._conn.execute(
+            "SELECT size FROM conversations WHERE id = ?",
+            (conversation_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def sweep(self) -> int:
+        if self.ttl_seconds <= 0:
+            return 0
+
+        cursor = self._conn.execute(
+            "DELETE FROM conversations WHERE last_access < ?",
+            (self._cutoff(),)
+        )
+        removed = cursor.rowcount
+        self.expirations += removed
+        if removed:
+            logger.info(f"Expired {removed} idle conversations")
+        self._stats = self._collect_stats()
+        return removed
+
+    def _collect_stats(self) -> Dict[str, Any]:
+        entries, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM conversations"
+        ).fetchone()
+        return {"entries": entries, "estimated_bytes": total_bytes, "as_of": time.time()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get occupancy as of the last sweep, plus live eviction counters"""
+        return {
+            "backend": "sqlite",
+            **self._stats,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Conversation store for any Redis-protocol server
+
+    Each conversation is a JSON string with a native idle TTL. A sorted set
+    indexed by last access time tracks occupancy and drives LRU eviction,
+    so every worker and host sees the same sessions. Commands run on worker
+    threads; stats() returns a snapshot refreshed by each sweep, so the
+    O(N) size scan never runs on a request path.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600.0,
+        sweep_interval: float = 60.0,
+        key_prefix: str = "phi3:conversation:",
+        client: Optional[Any] = None
+    ):
+        """
+        Initialize Redis conversation store
+
+        Args:
+            url: Redis connection URL
+            max_entries: Maximum number of conversations kept
+            ttl_seconds: Idle time after which a conversation expires (0 disables)
+            sweep_interval: Seconds between background index sweeps
+            key_prefix: Prefix for conversation keys
+            client: Existing Redis-compatible client (overrides url)
+        """
+        if client is None:
+            if redis is None:
+                raise ImportError("Redis conversation store requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.key_prefix = key_prefix
+        self.index_key = f"{key_prefix}index"
+        self.size_key = f"{key_prefix}sizes"
+        self.evictions = 0
+        self.expirations = 0
+        self._stats: Dict[str, Any] = {"entries": None, "estimated_bytes": None, "as_of": None}
+        logger.info(f"Using Redis conversation store at {url}")
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.key_prefix}{conversation_id}"
+
+    def _ttl_ms(self) -> Optional[int]:
+        return int(self.ttl_seconds * 1000) if self.ttl_seconds > 0 else None
+
+    def get(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        key = self._key(conversation_id)
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        if self._ttl_ms():
+            pipe.pexpire(key, self._ttl_ms())
+        raw = pipe.execute()[0]
+
+        if raw is None:
+            # Expired by Redis; drop it from the index as well
+            if self.client.zrem(self.index_key, conversation_id):
+                self.client.hdel(self.size_key, conversation_id)
+                self.expirations += 1
+            return None
+
+        self.client.zadd(self.index_key, {conversation_id: time.time()})
+        return json.loads(raw)
+
+    def set(self, conversation_id: str, messages: List[Dict[str, str]]):
+        pipe = self.client.pipeline()
+        pipe.set(self._key(conversation_id), json.dumps(messages), px=self._ttl_ms())
+        pipe.zadd(self.index_key, {conversation_id: time.time()})
+        pipe.hset(self.size_key, conversation_id, estimate_size(messages))
+        pipe.zcard(self.index_key)
+        count = pipe.execute()[-1]
+
+        if count > self.max_entries:
+            oldest = self.client.zrange(self.index_key, 0, count - self.max_entries - 1)
+            for member in oldest:
+                oldest_id = member.decode() if isinstance(member, bytes) else member
+                self.delete(oldest_id)
+                self.evictions += 1
+                logger.info(f"Evicted conversation: {oldest_id}")
+
+    def delete(self, conversation_id: str) -> bool:
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(conversation_id))
+        pipe.zrem(self.index_key, conversation_id)
+        pipe.hdel(self.size_key, conversation_id)
+        return pipe.execute()[0] > 0
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.client.exists(self._key(conversation_id)) > 0
+
+    def __len__(self) -> int:
+        return self.client.zcard(self.index_key)
+
+    def sweep(self) -> int:
+        stale = []
+        if self.ttl_seconds > 0:
+            # Keys expire on their own; this only trims the index and sizes
+            stale = self.client.zrangebyscore(self.index_key, "-inf", time.time() - self.ttl_seconds)
+            for member in stale:
+                stale_id = member.decode() if isinstance(member, bytes) else member
+                self.delete(stale_id)
+            self.expirations += len(stale)
+            if stale:
+                logger.info(f"Expired {len(stale)} idle conversations")
+        self._stats = self._collect_stats()
+        return len(stale)
+
+    def _collect_stats(self) -> Dict[str, Any]:
+        total_bytes = sum(
+            int(size) for _, size in self.client.hscan_iter(self.size_key, count=1000)
+        )
+        return {"entries": len(self), "estimated_bytes": total_bytes, "as_of": time.time()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get occupancy as of the last sweep, plus live eviction counters"""
+        return {
+            "backend": "redis",
+            **self._stats,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def close(self):
+        self.client.close()
+
+
+def create_conversation_store(settings) -> ConversationStore:
+    """
+    Create the conversation store selected in settings
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Conversation store instance
+    """
+    backend = settings.conversation_backend.lower()
+    common = {
+        "max_entries": settings.conversation_max_entries,
+        "ttl_seconds": settings.conversation_ttl_seconds,
+        "sweep_interval": settings.conversation_sweep_interval
+    }
+
+    if backend == "memory":
+        return InMemoryConversationStore(**common)
+    if backend == "sqlite":
+        return SQLiteConversationStore(path=settings.conversation_sqlite_path, **common)
+    if backend == "redis":
+        return RedisConversationStore(
+            url=settings.conversation_redis_url,
+            key_prefix=settings.conversation_redis_prefix,
+            **common
+        )
+    raise ValueError(f"Unknown conversation backend: {settings.conversation_backend}")
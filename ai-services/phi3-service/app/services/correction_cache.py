@@ -0,0 +1,268 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache lookups (Unicode form and whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CorrectionCache:
+    """
+    LRU + TTL cache for correction results with an optional SQLite disk tier
+
+    Code running on the event loop uses aget() and aset(), which run the
+    disk tier's queries on a dedicated worker thread. The disk tier is
+    bounded by run_sweeper(), which periodically drops expired rows and
+    the oldest rows beyond disk_max_entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400.0,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+        sweep_interval: float = 600.0
+    ):
+        """
+        Initialize correction cache
+
+        Args:
+            max_entries: Maximum number of results kept in memory
+            ttl_seconds: Time after which a cached result expires (0 disables)
+            disk_path: Optional SQLite file for a persistent second tier
+            disk_max_entries: Maximum number of results kept on disk (0 disables)
+            sweep_interval: Seconds between disk tier sweeps
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.sweep_interval = sweep_interval
+        # key -> (result, stored_at); least recently used first
+        self._entries: "OrderedDict[str, tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.disk_expirations = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS corrections ("
+                "key TEXT PRIMARY KEY, "
+                "result TEXT NOT NULL, "
+                "stored_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_corrections_stored_at "
+                "ON corrections (stored_at)"
+            )
+            # One thread, so the connection is never used concurrently
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="correction-cache")
+            logger.info(f"Using correction cache disk tier at {disk_path}")
+
+    @staticmethod
+    def make_key(
+        text: str,
+        target_language: str,
+        provide_explanation: bool,
+        model_name: str,
+        include_corrections: bool = True
+    ) -> str:
+        """Build a cache key from the normalized request fields"""
+        raw = json.dumps([
+            normalize_text(text),
+            target_language.strip().lower(),
+            provide_explanation,
+            model_name,
+            include_corrections
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _put_memory(self, key: str, result: Dict[str, Any], stored_at: float):
+        self._entries[key] = (result, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, stored_at = entry
+            if not self._is_expired(stored_at):
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        row = self._conn.execute(
+            "SELECT result, stored_at FROM corrections WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if self._is_expired(row[1]):
+            self._conn.execute("DELETE FROM corrections WHERE key = ?", (key,))
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _put_disk(self, key: str, payload: str, stored_at: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO corrections (key, result, stored_at) VALUES (?, ?, ?)",
+            (key, payload, stored_at)
+        )
+
+    def _finish_lookup(
+        self,
+        key: str,
+        entry: Optional[Tuple[Dict[str, Any], float]]
+    ) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self.misses += 1
+            return None
+        result, stored_at = entry
+        self._put_memory(key, result, stored_at)
+        self.disk_hits += 1
+        return copy.deepcopy(result)
+
+    async def _call(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached correction result (blocks on the disk tier)
+
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        result = self._get_memory(key)
+        if result is not None:
+            return result
+        return self._finish_lookup(key, self._get_disk(key) if self._conn is not None else None)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async get(), safe to call from the event loop"""
+        result = self._get_memory(key)
+        if result is not None:
+            return result
+        entry = await self._call(self._get_disk, key) if self._conn is not None else None
+        return self._finish_lookup(key, entry)
+
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store a correction result in memory and, if enabled, on disk (blocks)"""
+        stored_at = time.time()
+        self._put_memory(key, copy.deepcopy(result), stored_at)
+        if self._conn is not None:
+            self._put_disk(key, json.dumps(result), stored_at)
+
+    async def aset(self, key: str, result: Dict[str, Any]):
+        """Async set(), safe to call from the event loop"""
+        stored_at = time.time()
+        self._put_memory(key, copy.deepcopy(result), stored_at)
+        if self._conn is not None:
+            await self._call(self._put_disk, key, json.dumps(result), stored_at)
+
+    def sweep(self) -> int:
+        """
+        Remove expired results and the oldest results over disk_max_entries
+        from the disk tier
+
+        Returns:
+            Number of rows removed
+        """
+        if self._conn is None:
+            return 0
+
+        expired = 0
+        if self.ttl_seconds > 0:
+            expired = self._conn.execute(
+                "DELETE FROM corrections WHERE stored_at < ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self.disk_expirations += expired
+
+        evicted = 0
+        if self.disk_max_entries > 0:
+            count = self._conn.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+            if count > self.disk_max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM corrections WHERE key IN ("
+                    "SELECT key FROM corrections ORDER BY stored_at LIMIT ?)",
+                    (count - self.disk_max_entries,)
+                ).rowcount
+                self.disk_evictions += evicted
+
+        if expired or evicted:
+            logger.info(f"Removed {expired} expired and {evicted} excess cached corrections from disk")
+        return expired + evicted
+
+    async def run_sweeper(self):
+        """Sweep the disk tier now and periodically until cancelled"""
+        if self._conn is None:
+            return
+        while True:
+            try:
+                await self._call(self.sweep)
+            except Exception as e:
+                logger.error(f"Correction cache sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def clear(self):
+        """Remove all cached results"""
+        self._entries.clear()
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM corrections")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache occupancy and hit/miss counters"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": self._conn is not None,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "disk_expirations": self.disk_expirations
+        }
+
+    def close(self):
+        """Close the disk tier"""
+        if self._conn is not None:
+            self._executor.shutdown(wait=True)
+            self._conn.close()
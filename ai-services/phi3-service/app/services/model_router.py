@@ -0,0 +1,133 @@
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Any
+
+from app.services.tokens import count_tokens
+from app.services.usage_metrics import UsageMetrics
+
+logger = logging.getLogger(__name__)
+
+SMALL = "small"
+LARGE = "large"
+
+
+class ModelRouter:
+    """
+    Cost-based routing between a small, fast model and the main model
+
+    Short inputs on cheap operations go to the small model; everything else,
+    and any small-model answer that fails to parse or looks unreliable, goes
+    to the large model.
+    """
+
+    def __init__(
+        self,
+        small_model: str,
+        large_model: str,
+        correction_max_tokens: int = 32,
+        chat_max_tokens: int = 0,
+        latency_window: int = 1000
+    ):
+        """
+        Initialize model router
+
+        Args:
+            small_model: Ollama name of the small model
+            large_model: Ollama name of the large model
+            correction_max_tokens: Longest correction input sent to the small model
+            chat_max_tokens: Longest chat message sent to the small model (0 = never)
+            latency_window: Number of recent requests used for latency percentiles
+        """
+        self.small_model = small_model
+        self.large_model = large_model
+        self.limits = {
+            "correction": correction_max_tokens,
+            "chat": chat_max_tokens
+        }
+        self.decisions: Counter = Counter()
+        self.fallbacks: Counter = Counter()
+        # Per-tier token usage and latency, keyed by tier name
+        self.tiers = UsageMetrics(window=latency_window)
+
+    @property
+    def models(self) -> List[str]:
+        """Models that may receive traffic"""
+        return [self.large_model, self.small_model]
+
+    def model_for(self, tier: str) -> str:
+        return self.small_model if tier == SMALL else self.large_model
+
+    def choose(self, operation: str, text: str) -> str:
+        """
+        Pick a tier for a request
+
+        Args:
+            operation: Endpoint type (correction or chat)
+            text: User input the request is about
+
+        Returns:
+            SMALL or LARGE
+        """
+        limit = self.limits.get(operation, 0)
+        if limit <= 0:
+            reason = f"{operation}:endpoint"
+            tier = LARGE
+        elif count_tokens(text) > limit:
+            reason = f"{operation}:long_input"
+            tier = LARGE
+        else:
+            reason = f"{operation}:short_input"
+            tier = SMALL
+        self.decisions[f"{tier}/{reason}"] += 1
+        return tier
+
+    def record(self, tier: str, usage: Optional[Dict[str, Any]], latency_ms: float):
+        """Record a completed request on a tier"""
+        self.tiers.record(tier, usage, latency_ms)
+
+    def record_fallback(self, operation: str, reason: str):
+        """Record a small-model answer that was escalated to the large model"""
+        self.fallbacks[f"{operation}:{reason}"] += 1
+        logger.info(f"Escalating {operation} to {self.large_model}: {reason}")
+
+    @staticmethod
+    def check_correction(text: str, result: Dict[str, Any]) -> Optional[str]:
+        """
+        Confidence check for a small-model correction
+
+        Args:
+            text: Original text
+            result: Correction result from the small model
+
+        Returns:
+            Reason the result should not be trusted, or None if it looks sound
+        """
+        if result.get("parse_mode") == "fallback":
+            return "unparsed_output"
+
+        corrected = (result.get("corrected_text") or "").strip()
+        if not corrected:
+            return "empty_output"
+
+        # A correction rewrites a few words; a very different length is a rewrite
+        ratio = len(corrected) / max(1, len(text.strip()))
+        if ratio < 0.5 or ratio > 2.0:
+            return "length_mismatch"
+
+        lowered = text.lower()
+        for item in result.get("corrections") or []:
+            original = (item.get("original") or "").strip().lower()
+            if original and original not in lowered:
+                return "unknown_span"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get routing decisions, fallbacks and per-tier latency"""
+        return {
+            "small_model": self.small_model,
+            "large_model": self.large_model,
+            "limits": self.limits,
+            "decisions": dict(self.decisions),
+            "fallbacks": dict(self.fallbacks),
+            "tiers": self.tiers.stats()["operations"]
+        }
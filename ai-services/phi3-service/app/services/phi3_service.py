@@ -1,12 +1,84 @@
 import httpx
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, AsyncIterator
 from datetime import datetime
 import uuid
 import json
+import time
+import copy
+import hashlib
+import re
+
+from app.services.conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    create_conversation_store
+)
+from app.services.correction_cache import CorrectionCache, normalize_text
+from app.services.semantic_cache import SemanticCache, content_signature
+from app.services.single_flight import SingleFlight
+from app.services.scheduler import AdmissionScheduler, Priority
+from app.services.backend_pool import BackendPool, OllamaBackend
+from app.services.tokens import count_message_tokens, trim_to_token_budget
+from app.services.usage_metrics import UsageMetrics, extract_usage
+from app.services.model_router import ModelRouter, SMALL, LARGE
 
 logger = logging.getLogger(__name__)
 
+# Marks the system-side memory message produced by conversation compaction
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def _span_pattern(span: str) -> "re.Pattern":
+    # Whole-word, case-insensitive match of a correction's original span
+    return re.compile(rf"(?<!\w){re.escape(span)}(?!\w)", re.IGNORECASE)
+
+
+def _correction_spans(corrections: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Corrections that name their original span, or None if any does not"""
+    if not corrections or not all(c.get("original") for c in corrections):
+        return None
+    return corrections
+
+
+def _correction_applies(
+    cached: Dict[str, Any],
+    text: str,
+    signature: str,
+    cached_signature: Optional[str]
+) -> bool:
+    """
+    Whether a near-duplicate's cached correction is valid for this text
+    
+    Every corrected span must occur in the new text, and once the spans
+    are corrected the text must have the same content words as the cached
+    corrected text, so the two may only differ in case, punctuation and
+    filler words. Results without spans to check (no mistakes found,
+    corrections not requested, or the text protocol) are only reused when
+    the content words of the original texts are the same.
+    """
+    spans = _correction_spans(cached.get("corrections") or [])
+    if spans is None:
+        return cached_signature == signature
+    if not all(_span_pattern(c["original"]).search(text) for c in spans):
+        return False
+    corrected = _apply_corrections(text, spans, cached["corrected_text"])
+    return content_signature(corrected) == content_signature(cached["corrected_text"])
+
+
+def _apply_corrections(text: str, corrections: List[Dict[str, Any]], cached_text: str) -> str:
+    """Rebuild the corrected text for a near-duplicate from the cached spans"""
+    spans = _correction_spans(corrections)
+    if spans is None:
+        # Same content words, so the cached corrected text fits as is
+        return cached_text
+    for correction in spans:
+        text = _span_pattern(correction["original"]).sub(
+            lambda _: correction["corrected"], text, count=1
+        )
+    return text
+
 
 class Phi3Service:
     """Language model service using Ollama"""
@@ -15,7 +87,32 @@ class Phi3Service:
         self,
         ollama_base_url: str = "http://localhost:11434",
         model_name: str = "phi3",
-        max_history: int = 10
+        max_history: int = 0,
+        max_prompt_tokens: int = 3072,
+        context_window: int = 4096,
+        timeout: float = 120.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        ollama_base_urls: Optional[List[str]] = None,
+        failure_threshold: int = 3,
+        circuit_reset_seconds: float = 30.0,
+        probe_interval: float = 10.0,
+        keep_alive: str = "30m",
+        preload_model: bool = True,
+        keep_warm_interval: float = 240.0,
+        compaction_enabled: bool = False,
+        compaction_threshold_tokens: int = 2048,
+        compaction_keep_recent: int = 6,
+        json_mode: bool = True,
+        conversation_store: Optional[ConversationStore] = None,
+        correction_cache: Optional[CorrectionCache] = None,
+        scheduler: Optional[AdmissionScheduler] = None,
+        usage_metrics: Optional[UsageMetrics] = None,
+        model_router: Optional[ModelRouter] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        embedding_model: str = "nomic-embed-text",
+        semantic_cache_strict: bool = True
     ):
         """
         Initialize Phi-3 service with Ollama
@@ -23,45 +120,209 @@ class Phi3Service:
         Args:
             ollama_base_url: Ollama API base URL
             model_name: Model name in Ollama
-            max_history: Maximum conversation history to keep
+            max_history: Optional hard cap on kept turns (0 = token budget only)
+            max_prompt_tokens: Prompt token budget for conversation history
+            context_window: Model context size in tokens
+            timeout: Timeout for Ollama requests in seconds
+            max_connections: Maximum pooled connections to Ollama
+            max_keepalive_connections: Maximum idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept alive
+            ollama_base_urls: Several Ollama URLs to balance across (overrides ollama_base_url)
+            failure_threshold: Consecutive failures that open a backend's circuit
+            circuit_reset_seconds: Time before an open circuit allows a trial request
+            probe_interval: Seconds between backend health probes
+            keep_alive: How long Ollama keeps the model loaded after a request
+            preload_model: Load the model on every backend at startup
+            keep_warm_interval: Seconds between keep-warm pings (0 disables)
+            compaction_enabled: Summarize older turns once history grows large
+            compaction_threshold_tokens: History size that triggers compaction
+            compaction_keep_recent: Newest messages kept verbatim when compacting
+            json_mode: Request schema-constrained JSON for corrections
+            conversation_store: Store for conversation histories
+            correction_cache: Optional cache for correction results
+            scheduler: Admission scheduler limiting concurrent generations
+            usage_metrics: Aggregator for token usage and latency
+            model_router: Optional router sending cheap requests to a smaller model
+            semantic_cache: Optional near-duplicate cache for /correct and first-turn chats
+            embedding_model: Ollama model used to embed prompts for the semantic cache
+            semantic_cache_strict: Also require matching content words for chat hits;
+                without it, questions that differ in one word can share an answer
         """
         self.ollama_base_url = ollama_base_url.rstrip('/')
         self.model_name = model_name
         self.max_history = max_history
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
-        self.client = httpx.Client(timeout=120.0)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.context_window = context_window
+        self.json_mode = json_mode
+        # Ollama takes a duration string ("30m") or a number of seconds (-1 = forever)
+        self.keep_alive: Any = int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+        self.preload_model = preload_model
+        self.keep_warm_interval = keep_warm_interval
+        self.compaction_enabled = compaction_enabled
+        self.compaction_threshold_tokens = compaction_threshold_tokens
+        self.compaction_keep_recent = compaction_keep_recent
+        self._compaction_tasks: Dict[str, asyncio.Task] = {}
+        self.compactions = 0
+        self.compaction_failures = 0
+        # Stores define __len__, so an empty store is falsy; compare with None
+        self.conversations = (
+            conversation_store if conversation_store is not None else InMemoryConversationStore()
+        )
+        self.correction_cache = correction_cache
+        self.single_flight = SingleFlight()
+        self.scheduler = scheduler or AdmissionScheduler()
+        self.usage = usage_metrics or UsageMetrics()
+        self.router = model_router
+        self.semantic_cache = semantic_cache
+        self.embedding_model = embedding_model
+        self.semantic_cache_strict = semantic_cache_strict
+        self.embedding_failures = 0
+        self._background_tasks: List[asyncio.Task] = []
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # Shared pooled client so concurrent requests overlap on Ollama I/O
+        self.client = httpx.AsyncClient(timeout=timeout, limits=self.limits)
+        self.backends = BackendPool(
+            ollama_base_urls or [self.ollama_base_url],
+            client=self.client,
+            failure_threshold=failure_threshold,
+            circuit_reset_seconds=circuit_reset_seconds,
+            probe_interval=probe_interval
+        )
+        self.ollama_base_url = self.backends.primary.url
         self._check_ollama()
     
     def _check_ollama(self):
-        """Check if Ollama is running and model is available"""
+        """Check that at least one Ollama backend is running and has the model"""
+        reachable = 0
+        # Runs once at startup, before the event loop serves requests
+        with httpx.Client(timeout=10.0) as client:
+            for backend in self.backends.backends:
+                if self._check_backend(client, backend):
+                    reachable += 1
+                else:
+                    backend.healthy = False
+        
+        if not reachable:
+            logger.error("Make sure Ollama is running (ollama serve)")
+            raise ConnectionError(f"Cannot connect to Ollama at {self.ollama_base_url}")
+    
+    def _check_backend(self, client: httpx.Client, backend: OllamaBackend) -> bool:
+        """Check a single Ollama backend at startup"""
         try:
-            logger.info(f"Checking Ollama connection at {self.ollama_base_url}")
-            response = self.client.get(f"{self.ollama_base_url}/api/tags")
+            logger.info(f"Checking Ollama connection at {backend.url}")
+            response = client.get(f"{backend.url}/api/tags")
             
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 model_names = [m['name'] for m in models]
+                backend.models = model_names
+                backend.last_probe_at = time.monotonic()
                 logger.info(f"Ollama is running. Available models: {model_names}")
                 
                 if not any(self.model_name in name for name in model_names):
                     logger.warning(f"Model '{self.model_name}' not found. Available: {model_names}")
                     logger.warning(f"Run: ollama pull {self.model_name}")
-            else:
-                logger.warning(f"Could not connect to Ollama: {response.status_code}")
+                return True
+            
+            logger.warning(f"Could not connect to Ollama: {response.status_code}")
+            return False
         except Exception as e:
-            logger.error(f"Failed to connect to Ollama: {e}")
-            logger.error("Make sure Ollama is running (ollama serve)")
-            raise ConnectionError(f"Cannot connect to Ollama at {self.ollama_base_url}")
+            logger.error(f"Failed to connect to Ollama at {backend.url}: {e}")
+            return False
     
-    def is_model_loaded(self) -> bool:
-        """Check if Ollama is accessible"""
+    async def start(self):
+        """Preload the model and start background maintenance tasks"""
+        if self.preload_model:
+            await self.warm_up()
+        
+        self._background_tasks.append(
+            asyncio.create_task(self.conversations.run_sweeper())
+        )
+        if self.correction_cache is not None:
+            self._background_tasks.append(
+                asyncio.create_task(self.correction_cache.run_sweeper())
+            )
+        self._background_tasks.append(
+            asyncio.create_task(self.backends.run_prober())
+        )
+        if self.keep_warm_interval > 0:
+            self._background_tasks.append(
+                asyncio.create_task(self._run_keep_warm())
+            )
+    
+    @property
+    def served_models(self) -> List[str]:
+        """Models that receive traffic and are kept loaded"""
+        return self.router.models if self.router else [self.model_name]
+    
+    async def _warm_backend(self, backend: OllamaBackend) -> bool:
+        """
+        Load the served models on a backend and refresh their keep_alive
+        
+        A generate request without a prompt only loads the model.
+        """
         try:
-            response = self.client.get(f"{self.ollama_base_url}/api/tags")
-            return response.status_code == 200
-        except:
+            for model in self.served_models:
+                response = await self.client.post(
+                    f"{backend.url}/api/generate",
+                    json={"model": model, "keep_alive": self.keep_alive}
+                )
+                response.raise_for_status()
+            backend.warmed_at = time.time()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to warm model on {backend.url}: {e}")
             return False
     
-    def create_conversation(self, system_prompt: Optional[str] = None) -> str:
+    async def warm_up(self):
+        """Load the served models on every healthy backend"""
+        backends = [b for b in self.backends.backends if b.healthy]
+        logger.info(f"Preloading {self.served_models} on {len(backends)} backend(s)")
+        started = time.monotonic()
+        results = await asyncio.gather(*(self._warm_backend(b) for b in backends))
+        logger.info(
+            f"Model warm on {sum(results)}/{len(backends)} backend(s) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+    
+    async def _run_keep_warm(self):
+        """Periodically re-pin the model so Ollama never unloads it when idle"""
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            try:
+                await asyncio.gather(*(
+                    self._warm_backend(b) for b in self.backends.backends if b.healthy
+                ))
+            except Exception as e:
+                logger.error(f"Keep-warm ping failed: {e}")
+    
+    async def close(self):
+        """Stop background tasks and close the pooled Ollama client"""
+        tasks = self._background_tasks + list(self._compaction_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._background_tasks.clear()
+        await self.client.aclose()
+        self.conversations.close()
+        if self.correction_cache is not None:
+            self.correction_cache.close()
+    
+    def is_model_loaded(self) -> bool:
+        """
+        Check if at least one Ollama backend is accessible
+        
+        Answers from the background health poller's snapshot, without
+        any upstream request.
+        """
+        return self.backends.is_healthy()
+    
+    async def create_conversation(self, system_prompt: Optional[str] = None) -> str:
         """
         Create a new conversation
         
@@ -84,184 +345,927 @@ class Phi3Service:
                           "Correct their mistakes gently and provide clear explanations."
             })
         
-        self.conversations[conversation_id] = messages
+        await self.conversations.aset(conversation_id, messages)
         logger.info(f"Created conversation: {conversation_id}")
         return conversation_id
     
-    def get_conversation(self, conversation_id: str) -> List[Dict[str, str]]:
+    async def get_conversation(self, conversation_id: str) -> List[Dict[str, str]]:
         """Get conversation history"""
-        return self.conversations.get(conversation_id, [])
+        return await self.conversations.aget(conversation_id) or []
+    
+    async def _post_chat(
+        self,
+        payload: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        sticky_key: Optional[str] = None,
+        operation: str = "chat"
+    ) -> Dict[str, Any]:
+        """
+        Send a chat request to Ollama once the scheduler admits it
+        
+        A request that cannot connect to its backend is retried once on
+        another backend, since it never reached the first one.
+        
+        Args:
+            payload: Ollama /api/chat payload
+            priority: Admission priority class
+            sticky_key: Key keeping related requests on one backend
+            operation: Label under which usage metrics are recorded
+            
+        Returns:
+            Parsed Ollama response
+        """
+        started = time.monotonic()
+        async with self.scheduler.slot(priority):
+            tried: List[OllamaBackend] = []
+            while True:
+                try:
+                    async with self.backends.acquire(sticky_key, exclude=tried) as backend:
+                        tried.append(backend)
+                        response = await self.client.post(
+                            f"{backend.url}/api/chat",
+                            json=payload
+                        )
+                        response.raise_for_status()
+                        result = response.json()
+                except asyncio.CancelledError:
+                    # Closing the connection makes Ollama stop generating
+                    self.usage.record_cancellation(operation)
+                    raise
+                except httpx.ConnectError:
+                    if len(tried) >= min(2, len(self.backends)):
+                        raise
+                    logger.warning(f"Ollama backend {tried[-1].url} unreachable, retrying elsewhere")
+                else:
+                    self.usage.record(
+                        operation, extract_usage(result), (time.monotonic() - started) * 1000
+                    )
+                    return result
     
-    def chat(
+    async def _add_user_message(
         self,
         message: str,
         conversation_id: Optional[str] = None,
         system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
         max_tokens: int = 512
-    ) -> tuple[str, str]:
+    ) -> tuple[str, List[Dict[str, str]]]:
         """
-        Generate chat response using Ollama
+        Append a user message to a conversation, creating it if needed
+        
+        History is trimmed to a prompt token budget that leaves room for
+        max_tokens of generation; the system prompt is always kept.
         
         Args:
             message: User message
             conversation_id: Optional conversation ID
-            system_prompt: Optional system prompt
-            temperature: Sampling temperature
-            max_tokens: Maximum tokens to generate
+            system_prompt: Optional system prompt for new conversations
+            max_tokens: Tokens reserved for the reply
             
         Returns:
-            Tuple of (response, conversation_id)
+            Tuple of (conversation_id, messages to send)
         """
         # Create or get conversation
-        if not conversation_id or conversation_id not in self.conversations:
-            conversation_id = self.create_conversation(system_prompt)
+        messages = await self.conversations.aget(conversation_id) if conversation_id else None
+        if messages is None:
+            conversation_id = await self.create_conversation(system_prompt)
+            messages = await self.conversations.aget(conversation_id)
         
         # Add user message
-        self.conversations[conversation_id].append({
+        messages = messages + [{
             "role": "user",
             "content": message
-        })
+        }]
         
         # Limit conversation history
-        if len(self.conversations[conversation_id]) > self.max_history * 2:
-            system_msg = self.conversations[conversation_id][0]
-            recent_msgs = self.conversations[conversation_id][-(self.max_history * 2 - 1):]
-            self.conversations[conversation_id] = [system_msg] + recent_msgs
+        if self.max_history and len(messages) > self.max_history * 2:
+            messages = [messages[0]] + messages[-(self.max_history * 2 - 1):]
+        budget = min(self.max_prompt_tokens, self.context_window - max_tokens)
+        messages = trim_to_token_budget(messages, budget)
         
-        try:
-            # Prepare messages for Ollama
-            messages = self.conversations[conversation_id]
-            
-            # Call Ollama API
-            payload = {
-                "model": self.model_name,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    "top_p": 0.9
+        await self.conversations.aset(conversation_id, messages)
+        return conversation_id, messages
+    
+    async def _add_assistant_message(self, conversation_id: str, content: str):
+        """Append an assistant reply to a conversation if it still exists"""
+        messages = await self.conversations.aget(conversation_id)
+        if messages is None:
+            logger.warning(f"Conversation {conversation_id} expired before reply was stored")
+            return
+        messages = messages + [{
+            "role": "assistant",
+            "content": content
+        }]
+        await self.conversations.aset(conversation_id, messages)
+        
+        if self.compaction_enabled:
+            self._maybe_schedule_compaction(conversation_id, messages)
+    
+    def _maybe_schedule_compaction(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Start background compaction if the history has grown past the threshold"""
+        if conversation_id in self._compaction_tasks:
+            return
+        if len(messages) - 1 <= self.compaction_keep_recent:
+            return
+        history_tokens = sum(count_message_tokens(m) for m in messages[1:])
+        if history_tokens <= self.compaction_threshold_tokens:
+            return
+        
+        # Runs outside the request path; the reply has already been returned
+        task = asyncio.create_task(self._compact_conversation(conversation_id))
+        self._compaction_tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._compaction_tasks.pop(conversation_id, None))
+    
+    async def _compact_conversation(self, conversation_id: str):
+        """
+        Fold older turns into a single system-side summary message
+        
+        The newest compaction_keep_recent messages stay verbatim. If the
+        conversation changed in a way that removed the summarized turns
+        while the summary was generated, the result is discarded.
+        """
+        messages = await self.conversations.aget(conversation_id)
+        if messages is None or len(messages) - 1 <= self.compaction_keep_recent:
+            return
+        
+        older = messages[1:len(messages) - self.compaction_keep_recent]
+        transcript = "\n".join(
+            m["content"][len(SUMMARY_PREFIX):] if m["content"].startswith(SUMMARY_PREFIX)
+            else f"{m['role']}: {m['content']}"
+            for m in older
+        )
+        payload = {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You condense tutoring conversations into short notes for the tutor."
+                },
+                {
+                    "role": "user",
+                    "content": "Summarize the conversation below in a few sentences. Keep the learner's "
+                               "level, goals, recurring mistakes and any facts they shared.\n\n" + transcript
                 }
+            ],
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": 0.3, "num_predict": 256, "top_p": 0.9}
+        }
+        
+        try:
+            result = await self._post_chat(
+                payload, Priority.BATCH, sticky_key=conversation_id, operation="compaction"
+            )
+            summary = result['message']['content'].strip()
+        except Exception as e:
+            self.compaction_failures += 1
+            logger.warning(f"Failed to compact conversation {conversation_id}: {e}")
+            return
+        
+        current = await self.conversations.aget(conversation_id)
+        if current is None or current[1:1 + len(older)] != older:
+            logger.info(f"Conversation {conversation_id} changed during compaction, skipping")
+            return
+        
+        await self.conversations.aset(
+            conversation_id,
+            [current[0], {"role": "system", "content": SUMMARY_PREFIX + summary}]
+            + current[1 + len(older):]
+        )
+        self.compactions += 1
+        logger.info(f"Compacted {len(older)} messages in conversation {conversation_id}")
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build an Ollama /api/chat payload"""
+        return {
+            "model": model or self.model_name,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                "top_p": 0.9
             }
+        }
+    
+    async def chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512
+    ) -> tuple[str, str, Optional[Dict[str, Any]]]:
+        """
+        Generate chat response using Ollama
+        
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
             
-            response = self.client.post(
-                f"{self.ollama_base_url}/api/chat",
-                json=payload
+        Returns:
+            Tuple of (response, conversation_id, token usage reported by Ollama)
+        """
+        # Only a first turn is stateless enough to share answers across users
+        semantic_entry = None
+        if self.semantic_cache is not None and conversation_id is None:
+            scope = json.dumps(["chat", system_prompt or "", temperature, max_tokens, self.model_name])
+            signature = content_signature(message)
+            guard = (lambda _, cached: cached == signature) if self.semantic_cache_strict else None
+            vector = await self._embed(message)
+            if vector is not None:
+                cached = self.semantic_cache.get(scope, vector, guard=guard)
+                if cached is not None:
+                    conversation_id, _ = await self._add_user_message(
+                        message, None, system_prompt, max_tokens
+                    )
+                    await self._add_assistant_message(conversation_id, cached["response"])
+                    logger.info(f"Served first turn of {conversation_id} from semantic cache")
+                    return cached["response"], conversation_id, None
+                semantic_entry = (scope, vector, signature)
+        
+        conversation_id, messages = await self._add_user_message(
+            message, conversation_id, system_prompt, max_tokens
+        )
+        tier = self.router.choose("chat", message) if self.router else None
+        
+        try:
+            payload = self._build_payload(
+                messages, temperature, max_tokens,
+                model=self.router.model_for(tier) if tier else None
             )
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._coalesced_chat(payload, conversation_id, tier)
             assistant_message = result['message']['content'].strip()
             
+            if tier == SMALL and not assistant_message:
+                self.router.record_fallback("chat", "empty_output")
+                payload["model"] = self.router.large_model
+                result = await self._coalesced_chat(payload, conversation_id, LARGE)
+                assistant_message = result['message']['content'].strip()
+            
             # Add assistant response to conversation
-            self.conversations[conversation_id].append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+            await self._add_assistant_message(conversation_id, assistant_message)
+            if semantic_entry is not None and assistant_message:
+                scope, vector, signature = semantic_entry
+                self.semantic_cache.set(scope, vector, {"response": assistant_message}, signature)
             
             logger.info(f"Generated response for conversation {conversation_id}")
-            return assistant_message, conversation_id
+            return assistant_message, conversation_id, extract_usage(result)
             
         except Exception as e:
             logger.error(f"Failed to generate response: {e}")
             raise
     
-    def correct_text(
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """
+        Embed a prompt for the semantic cache
+        
+        Embeddings are cheap and use a separate model, so they bypass the
+        admission scheduler. Failures only disable the lookup.
+        """
+        try:
+            async with self.backends.acquire() as backend:
+                response = await self.client.post(
+                    f"{backend.url}/api/embed",
+                    json={
+                        "model": self.embedding_model,
+                        "input": text,
+                        "keep_alive": self.keep_alive
+                    }
+                )
+                response.raise_for_status()
+                return response.json()["embeddings"][0]
+        except Exception as e:
+            self.embedding_failures += 1
+            logger.warning(f"Failed to embed prompt for semantic cache: {e}")
+            return None
+    
+    async def _coalesced_chat(
+        self,
+        payload: Dict[str, Any],
+        conversation_id: str,
+        tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send a chat payload; identical in-flight requests share one call"""
+        flight_key = "chat:" + hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        
+        started = time.monotonic()
+        result = await self.single_flight.do(
+            flight_key,
+            lambda: self._post_chat(payload, sticky_key=conversation_id)
+        )
+        if tier:
+            self.router.record(tier, extract_usage(result), (time.monotonic() - started) * 1000)
+        return result
+    
+    async def chat_stream(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat response from Ollama chunk by chunk
+        
+        The assistant message is added to the conversation history once
+        the stream completes.
+        
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Chunk dictionaries with the text delta; the last one has
+            done=True and carries the full response and token usage
+        """
+        started = time.monotonic()
+        conversation_id, messages = await self._add_user_message(
+            message, conversation_id, system_prompt, max_tokens
+        )
+        tier = self.router.choose("chat", message) if self.router else None
+        payload = self._build_payload(
+            messages, temperature, max_tokens, stream=True,
+            model=self.router.model_for(tier) if tier else None
+        )
+        
+        parts: List[str] = []
+        usage = None
+        try:
+            async with self.scheduler.slot(Priority.INTERACTIVE), \
+                    self.backends.acquire(conversation_id) as backend, \
+                    self.client.stream("POST", f"{backend.url}/api/chat", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"])
+                    
+                    delta = chunk.get("message", {}).get("content", "")
+                    if delta:
+                        parts.append(delta)
+                        yield {
+                            "conversation_id": conversation_id,
+                            "delta": delta,
+                            "done": False
+                        }
+                    if chunk.get("done"):
+                        usage = extract_usage(chunk)
+                        break
+        except (asyncio.CancelledError, GeneratorExit):
+            # The consumer went away mid-stream; the upstream request is closed
+            self.usage.record_cancellation("chat_stream")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to stream response: {e}")
+            raise
+        
+        self.usage.record("chat_stream", usage, (time.monotonic() - started) * 1000)
+        if tier:
+            self.router.record(tier, usage, (time.monotonic() - started) * 1000)
+        assistant_message = "".join(parts).strip()
+        await self._add_assistant_message(conversation_id, assistant_message)
+        
+        logger.info(f"Streamed response for conversation {conversation_id}")
+        yield {
+            "conversation_id": conversation_id,
+            "delta": "",
+            "done": True,
+            "response": assistant_message,
+            "usage": usage
+        }
+    
+    async def correct_text(
         self,
         text: str,
         target_language: str = "en",
-        provide_explanation: bool = True
+        provide_explanation: bool = True,
+        include_corrections: bool = True,
+        priority: Priority = Priority.CORRECTION
     ) -> Dict[str, Any]:
         """
         Correct language mistakes in text
         
+        Results are served from the correction cache when an equivalent
+        request (after normalization) was answered before, and concurrent
+        equivalent requests share a single generation.
+        
         Args:
             text: Text to correct
             target_language: Target language
             provide_explanation: Whether to provide explanation
+            include_corrections: Whether to list the individual corrections
+            priority: Admission priority class
             
         Returns:
             Dictionary with corrections
         """
-        # Create correction prompt
-        prompt = f"""Correct the following {target_language} text and explain the mistakes:
+        cache_key = CorrectionCache.make_key(
+            text, target_language, provide_explanation, self.model_name,
+            include_corrections=include_corrections
+        )
+        if self.correction_cache is not None:
+            cached = await self.correction_cache.aget(cache_key)
+            if cached is not None:
+                # Nothing was generated for this request
+                cached["original_text"] = text
+                cached["usage"] = None
+                return cached
+        
+        # A near-duplicate is only served if its corrections still apply to
+        # this text; they are then applied to this text (see _correction_applies)
+        semantic_entry = None
+        if self.semantic_cache is not None:
+            scope = json.dumps([
+                "correct", target_language.strip().lower(), provide_explanation,
+                include_corrections, self.model_name
+            ])
+            vector = await self._embed(normalize_text(text))
+            if vector is not None:
+                signature = content_signature(text)
+                similar = self.semantic_cache.get(
+                    scope, vector,
+                    guard=lambda cached, cached_signature: _correction_applies(
+                        cached, text, signature, cached_signature
+                    )
+                )
+                if similar is not None:
+                    similar["original_text"] = text
+                    similar["corrected_text"] = _apply_corrections(
+                        text, similar["corrections"], similar["corrected_text"]
+                    )
+                    similar["usage"] = None
+                    return similar
+                semantic_entry = (scope, vector, signature)
+        
+        async def generate() -> Dict[str, Any]:
+            result = await self._route_correction(
+                text, target_language, provide_explanation, include_corrections, priority
+            )
+            # A fallback result is the uncorrected text; caching it would
+            # keep serving that to retries for the whole TTL
+            if result["parse_mode"] == "fallback":
+                return result
+            if self.correction_cache is not None:
+                await self.correction_cache.aset(cache_key, result)
+            if semantic_entry is not None:
+                scope, vector, signature = semantic_entry
+                self.semantic_cache.set(scope, vector, result, signature)
+            return result
+        
+        # The shared result may go to several callers, so hand out copies
+        result = copy.deepcopy(await self.single_flight.do(f"correct:{cache_key}", generate))
+        result["original_text"] = text
+        return result
+    
+    async def _route_correction(
+        self,
+        text: str,
+        target_language: str,
+        provide_explanation: bool,
+        include_corrections: bool,
+        priority: Priority
+    ) -> Dict[str, Any]:
+        """
+        Generate a correction on the cheapest model that handles it well
+        
+        Short texts try the small model first; its answer is escalated to
+        the large model when the structured output does not parse or fails
+        the confidence check.
+        """
+        args = (text, target_language, provide_explanation, include_corrections, priority)
+        if self.router is None:
+            return await self._generate_correction(*args)
+        
+        if self.router.choose("correction", text) == SMALL:
+            started = time.monotonic()
+            try:
+                result = await self._generate_correction(*args, model=self.router.small_model)
+            except httpx.HTTPError as e:
+                # e.g. the small model is not pulled on this backend
+                reason = f"error:{type(e).__name__}"
+            else:
+                self.router.record(SMALL, result["usage"], (time.monotonic() - started) * 1000)
+                reason = ModelRouter.check_correction(text, result)
+                if reason is None:
+                    return result
+            self.router.record_fallback("correction", reason)
+        
+        started = time.monotonic()
+        result = await self._generate_correction(*args, model=self.router.large_model)
+        self.router.record(LARGE, result["usage"], (time.monotonic() - started) * 1000)
+        return result
+    
+    async def correct_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Correct several texts with bounded parallelism
+        
+        Args:
+            items: Keyword arguments for correct_text(), one dict per text
+            concurrency: Maximum number of corrections running at once
+            
+        Returns:
+            List of {"result": ..., "error": ...} dicts in input order
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self.correct_text(**item, priority=Priority.BATCH)
+                    return {"result": result, "error": None}
+                except Exception as e:
+                    # Details stay in the log; like /correct, clients get a generic message
+                    logger.error(f"Batch item failed: {type(e).__name__}: {e}")
+                    return {"result": None, "error": "Correction failed"}
+        
+        return await asyncio.gather(*(run(item) for item in items))
+    
+    def _build_correction_prompt(
+        self,
+        text: str,
+        target_language: str,
+        provide_explanation: bool,
+        include_corrections: bool
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Build a correction prompt that only asks for the requested sections
+        
+        Returns:
+            Tuple of (prompt, Ollama options with num_predict and stop)
+        """
+        # Corrected text is roughly as long as the input (~3 chars per token)
+        num_predict = len(text) // 3 + 32
+        sections = ["CORRECTED: <corrected text>"]
+        stop = []
+        
+        if include_corrections:
+            sections.append("CORRECTIONS:\n- <mistake 1>: <correction 1>\n- <mistake 2>: <correction 2>")
+            num_predict += 160
+        if provide_explanation:
+            sections.append("EXPLANATION: <brief explanation>")
+            num_predict += 200
+        elif include_corrections:
+            stop.append("EXPLANATION:")
+        
+        if not include_corrections and not provide_explanation:
+            # Corrected text only: stop as soon as the CORRECTED: line ends
+            prompt = f"""Correct the following {target_language} text.
+
+Text: "{text}"
+
+Reply with exactly one line and nothing else:
+CORRECTED: <corrected text>"""
+            stop.append("\n")
+        else:
+            tasks = ["The corrected text"]
+            if include_corrections:
+                tasks.append("A list of specific corrections made")
+            if provide_explanation:
+                tasks.append("Brief explanation of why each correction was needed")
+            task_list = "\n".join(f"{i}. {task}" for i, task in enumerate(tasks, 1))
+            format_lines = "\n".join(sections)
+            prompt = f"""Correct the following {target_language} text{" and explain the mistakes" if provide_explanation else ""}:
 
 Text: "{text}"
 
 Provide:
-1. The corrected text
-2. A list of specific corrections made
-3. Brief explanation of why each correction was needed
+{task_list}
 
 Format your response as:
-CORRECTED: <corrected text>
-CORRECTIONS:
-- <mistake 1>: <correction 1>
-- <mistake 2>: <correction 2>
-EXPLANATION: <brief explanation>"""
-        
-        # Create temporary conversation for correction
-        temp_id = self.create_conversation(
-            "You are a language correction assistant. Correct mistakes and explain them clearly."
-        )
+{format_lines}"""
         
+        options = {
+            "temperature": 0.7,
+            "num_predict": min(num_predict, 512),
+            "top_p": 0.9
+        }
+        if stop:
+            options["stop"] = stop
+        return prompt, options
+    
+    def _build_json_correction_prompt(
+        self,
+        text: str,
+        target_language: str,
+        provide_explanation: bool,
+        include_corrections: bool
+    ) -> tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """
+        Build a correction prompt for schema-constrained JSON output
+        
+        Returns:
+            Tuple of (prompt, Ollama options, JSON schema for the format field)
+        """
+        properties: Dict[str, Any] = {"corrected_text": {"type": "string"}}
+        example: Dict[str, Any] = {"corrected_text": "<corrected text>"}
+        # JSON syntax costs a few extra tokens over the text protocol
+        num_predict = len(text) // 3 + 48
+        
+        if include_corrections:
+            properties["corrections"] = {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "original": {"type": "string"},
+                        "corrected": {"type": "string"}
+                    },
+                    "required": ["original", "corrected"]
+                }
+            }
+            example["corrections"] = [{"original": "<mistake>", "corrected": "<correction>"}]
+            num_predict += 200
+        if provide_explanation:
+            properties["explanation"] = {"type": "string"}
+            example["explanation"] = "<brief explanation>"
+            num_predict += 200
+        
+        schema = {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties)
+        }
+        prompt = f"""Correct the following {target_language} text{" and explain the mistakes" if provide_explanation else ""}:
+
+Text: "{text}"
+
+Respond only with JSON in this form:
+{json.dumps(example, ensure_ascii=False)}"""
+        
+        options = {
+            "temperature": 0.7,
+            "num_predict": min(num_predict, 512),
+            "top_p": 0.9
+        }
+        return prompt, options, schema
+    
+    def _parse_json_correction(self, text: str, response: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a JSON correction reply in a single pass
+        
+        Returns:
+            Parsed sections, or None if the reply does not match the schema
+        """
         try:
-            response, _ = self.chat(prompt, temp_id, max_tokens=512)
-            
-            # Parse response
-            corrected_text = text  # fallback
-            corrections = []
-            explanation = ""
-            
-            if "CORRECTED:" in response:
-                parts = response.split("CORRECTED:")
-                if len(parts) > 1:
-                    corrected_part = parts[1].split("CORRECTIONS:")[0].strip()
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            return None
+        
+        if not isinstance(data, dict) or not isinstance(data.get("corrected_text"), str):
+            return None
+        
+        corrections = []
+        for item in data.get("corrections") or []:
+            if not isinstance(item, dict):
+                return None
+            original = str(item.get("original", "")).strip()
+            corrected = str(item.get("corrected", "")).strip()
+            corrections.append({
+                "original": original,
+                "corrected": corrected,
+                # Same shape as the text protocol so clients see one format
+                "correction": f"{original}: {corrected}"
+            })
+        
+        explanation = data.get("explanation")
+        return {
+            "corrected_text": data["corrected_text"].strip() or text,
+            "corrections": corrections,
+            "explanation": explanation.strip() if isinstance(explanation, str) else ""
+        }
+    
+    def _parse_text_correction(self, text: str, response: str) -> Dict[str, Any]:
+        """Parse the CORRECTED:/CORRECTIONS:/EXPLANATION: text protocol"""
+        corrected_text = text  # fallback
+        corrections = []
+        explanation = ""
+        
+        if "CORRECTED:" in response:
+            parts = response.split("CORRECTED:")
+            if len(parts) > 1:
+                corrected_part = parts[1].split("CORRECTIONS:")[0].split("EXPLANATION:")[0].strip()
+                if corrected_part:
                     corrected_text = corrected_part
+        
+        if "CORRECTIONS:" in response:
+            parts = response.split("CORRECTIONS:")
+            if len(parts) > 1:
+                corr_part = parts[1].split("EXPLANATION:")[0].strip()
+                for line in corr_part.split("\n"):
+                    if line.strip().startswith("-"):
+                        corrections.append({"correction": line.strip()[1:].strip()})
+        
+        if "EXPLANATION:" in response:
+            parts = response.split("EXPLANATION:")
+            if len(parts) > 1:
+                explanation = parts[1].strip()
+        
+        return {
+            "corrected_text": corrected_text,
+            "corrections": corrections,
+            "explanation": explanation
+        }
+    
+    async def _generate_correction(
+        self,
+        text: str,
+        target_language: str,
+        provide_explanation: bool,
+        include_corrections: bool = True,
+        priority: Priority = Priority.CORRECTION,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a correction generation against Ollama and parse the reply
+        
+        In JSON mode the reply is constrained by a schema; if the model
+        still drifts, the legacy text protocol parser is applied instead.
+        """
+        schema = None
+        if self.json_mode:
+            prompt, options, schema = self._build_json_correction_prompt(
+                text, target_language, provide_explanation, include_corrections
+            )
+        else:
+            prompt, options = self._build_correction_prompt(
+                text, target_language, provide_explanation, include_corrections
+            )
+        
+        # One-off exchange, kept out of the conversation store
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a language correction assistant. Correct mistakes and explain them clearly."
+            },
+            {"role": "user", "content": prompt}
+        ]
+        
+        try:
+            payload = {
+                "model": model or self.model_name,
+                "messages": messages,
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": options
+            }
+            if schema is not None:
+                payload["format"] = schema
             
-            if "CORRECTIONS:" in response:
-                parts = response.split("CORRECTIONS:")
-                if len(parts) > 1:
-                    corr_part = parts[1].split("EXPLANATION:")[0].strip()
-                    for line in corr_part.split("\n"):
-                        if line.strip().startswith("-"):
-                            corrections.append({"correction": line.strip()[1:].strip()})
-            
-            if "EXPLANATION:" in response:
-                parts = response.split("EXPLANATION:")
-                if len(parts) > 1:
-                    explanation = parts[1].strip()
+            result = await self._post_chat(payload, priority, operation="correction")
+            response = result['message']['content'].strip()
             
-            # Clean up temporary conversation
-            del self.conversations[temp_id]
+            parsed = self._parse_json_correction(text, response) if schema is not None else None
+            if parsed is not None:
+                parse_mode = "json"
+            else:
+                parsed = self._parse_text_correction(text, response)
+                parse_mode = "fallback" if schema is not None else "text"
+                if schema is not None:
+                    logger.warning("JSON correction output did not match schema, using text parser")
             
             return {
                 "original_text": text,
-                "corrected_text": corrected_text,
-                "corrections": corrections,
-                "explanation": explanation if provide_explanation else None
+                "corrected_text": parsed["corrected_text"],
+                "corrections": parsed["corrections"] if include_corrections else [],
+                "explanation": parsed["explanation"] if provide_explanation else None,
+                "parse_mode": parse_mode,
+                "model": payload["model"],
+                "usage": extract_usage(result)
             }
             
         except Exception as e:
             logger.error(f"Failed to correct text: {e}")
-            # Clean up on error
-            if temp_id in self.conversations:
-                del self.conversations[temp_id]
             raise
     
-    def clear_conversation(self, conversation_id: str):
+    async def clear_conversation(self, conversation_id: str):
         """Clear a conversation"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        if await self.conversations.adelete(conversation_id):
             logger.info(f"Cleared conversation: {conversation_id}")
     
+    def get_usage_metrics(self) -> Dict[str, Any]:
+        """Get aggregated token usage, generation speed and latency"""
+        return self.usage.stats()
+    
     def get_model_info(self) -> Dict[str, Any]:
-        """Get model information"""
+        """Get model information from cached state (no upstream I/O)"""
+        conversation_stats = self.conversations.stats()
         return {
             "model_name": self.model_name,
             "ollama_url": self.ollama_base_url,
+            "backends": self.backends.stats(),
             "max_history": self.max_history,
-            "active_conversations": len(self.conversations),
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "context_window": self.context_window,
+            "active_conversations": conversation_stats["entries"],
+            "conversation_store": conversation_stats,
+            "correction_cache": self.correction_cache.stats() if self.correction_cache else None,
+            "routing": self.router.stats() if self.router else None,
+            "semantic_cache": {
+                **self.semantic_cache.stats(),
+                "embedding_model": self.embedding_model,
+                "embedding_failures": self.embedding_failures
+            } if self.semantic_cache else None,
+            "compaction": {
+                "enabled": self.compaction_enabled,
+                "threshold_tokens": self.compaction_threshold_tokens,
+                "compactions": self.compactions,
+                "failures": self.compaction_failures,
+                "in_progress": len(self._compaction_tasks)
+            },
+            "coalescing": self.single_flight.stats(),
+            "scheduler": self.scheduler.stats(),
+            "model_available": self.backends.has_model(self.model_name),
+            "keep_alive": self.keep_alive,
+            "model_pinned": self.backends.is_model_pinned(self.model_name),
             "status": "connected" if self.is_model_loaded() else "disconnected"
         }
+
+
+def create_phi3_service(settings) -> Phi3Service:
+    """
+    Create a Phi3Service configured from settings
+    
+    Args:
+        settings: Application settings
+        
+    Returns:
+        Phi3Service instance (call start() before serving requests)
+    """
+    return Phi3Service(
+        ollama_base_url=settings.ollama_base_url,
+        model_name=settings.model_name,
+        max_history=settings.max_conversation_history,
+        max_prompt_tokens=settings.max_prompt_tokens,
+        context_window=settings.context_window,
+        timeout=settings.ollama_timeout,
+        max_connections=settings.ollama_max_connections,
+        max_keepalive_connections=settings.ollama_max_keepalive_connections,
+        keepalive_expiry=settings.ollama_keepalive_expiry,
+        ollama_base_urls=settings.get_ollama_base_urls(),
+        failure_threshold=settings.ollama_failure_threshold,
+        circuit_reset_seconds=settings.ollama_circuit_reset_seconds,
+        probe_interval=settings.ollama_probe_interval,
+        keep_alive=settings.ollama_keep_alive,
+        preload_model=settings.preload_model,
+        keep_warm_interval=settings.keep_warm_interval,
+        compaction_enabled=settings.compaction_enabled,
+        compaction_threshold_tokens=settings.compaction_threshold_tokens,
+        compaction_keep_recent=settings.compaction_keep_recent,
+        json_mode=settings.correction_json_mode,
+        conversation_store=create_conversation_store(settings),
+        correction_cache=CorrectionCache(
+            max_entries=settings.correction_cache_max_entries,
+            ttl_seconds=settings.correction_cache_ttl_seconds,
+            disk_path=settings.correction_cache_disk_path or None,
+            disk_max_entries=settings.correction_cache_disk_max_entries,
+            sweep_interval=settings.correction_cache_sweep_interval
+        ) if settings.correction_cache_enabled else None,
+        scheduler=AdmissionScheduler(
+            # Capacity grows with the number of backends
+            max_concurrent=settings.scheduler_max_concurrent * len(settings.get_ollama_base_urls()),
+            max_queue=settings.scheduler_max_queue,
+            deadlines={
+                Priority.INTERACTIVE: settings.scheduler_deadline_interactive,
+                Priority.CORRECTION: settings.scheduler_deadline_correction,
+                Priority.BATCH: settings.scheduler_deadline_batch
+            }
+        ),
+        usage_metrics=UsageMetrics(window=settings.metrics_latency_window),
+        model_router=ModelRouter(
+            small_model=settings.small_model_name,
+            large_model=settings.model_name,
+            correction_max_tokens=settings.routing_correction_max_tokens,
+            chat_max_tokens=settings.routing_chat_max_tokens,
+            latency_window=settings.metrics_latency_window
+        ) if settings.small_model_name else None,
+        semantic_cache=SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            threshold=settings.semantic_cache_threshold,
+            ttl_seconds=settings.semantic_cache_ttl_seconds
+        ) if settings.semantic_cache_enabled else None,
+        embedding_model=settings.embedding_model,
+        semantic_cache_strict=settings.semantic_cache_strict
+    )
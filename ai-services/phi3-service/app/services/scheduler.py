@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Admission priority classes (lower value is served first)"""
+    INTERACTIVE = 0
+    CORRECTION = 1
+    BATCH = 2
+
+
+class SchedulerError(Exception):
+    """Base class for admission failures"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(SchedulerError):
+    """Raised when the admission queue is full"""
+
+
+class QueueTimeoutError(SchedulerError):
+    """Raised when a request's deadline passes before it is admitted"""
+
+
+class AdmissionScheduler:
+    """
+    Bounded priority queue in front of Ollama
+
+    At most max_concurrent generations run at once; further requests wait
+    in priority order until a slot frees up or their deadline passes.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 2,
+        max_queue: int = 64,
+        deadlines: Optional[Dict[Priority, float]] = None
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            max_concurrent: Maximum generations sent to Ollama at once
+            max_queue: Maximum number of waiting requests
+            deadlines: Default queue deadline in seconds per priority class
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.deadlines = deadlines or {
+            Priority.INTERACTIVE: 15.0,
+            Priority.CORRECTION: 30.0,
+            Priority.BATCH: 120.0
+        }
+        self.in_flight = 0
+        # (priority, sequence, future); cancelled futures are skipped lazily
+        self._queue: List[tuple[int, int, asyncio.Future]] = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        # Exponential moving average of how long a slot is held
+        self._avg_service_time = 1.0
+
+    def _retry_after(self) -> int:
+        backlog = self._waiting + self.in_flight
+        return max(1, math.ceil(backlog * self._avg_service_time / self.max_concurrent))
+
+    async def _acquire(self, priority: Priority, deadline: float):
+        if self.in_flight < self.max_concurrent and self._waiting == 0:
+            self.in_flight += 1
+            return
+
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError("Server is busy, admission queue is full", self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), future))
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(future, timeout=max(0.0, deadline - time.monotonic()))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                future.cancel()
+                self._waiting -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise QueueTimeoutError(
+                    "Request deadline exceeded while waiting in queue",
+                    self._retry_after()
+                ) from None
+            raise
+
+    def _release(self):
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                self._waiting -= 1
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a generation slot for the duration of the block
+
+        Args:
+            priority: Priority class of the request
+            timeout: Queue deadline in seconds (defaults to the class deadline)
+
+        Raises:
+            QueueFullError: If the queue is full
+            QueueTimeoutError: If the deadline passes before admission
+        """
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + (timeout if timeout is not None else self.deadlines[priority])
+        await self._acquire(priority, deadline)
+
+        admitted_at = time.monotonic()
+        wait = admitted_at - enqueued_at
+        self.admitted += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        try:
+            yield
+        finally:
+            held = time.monotonic() - admitted_at
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * held
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and rejection counters"""
+        depth = {p.name.lower(): 0 for p in Priority}
+        for priority, _, future in self._queue:
+            if not future.done():
+                depth[Priority(priority).name.lower()] += 1
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self._waiting,
+            "queue_depth_by_priority": depth,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self._total_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+            "avg_service_ms": round(self._avg_service_time * 1000, 2)
+        }
@@ -0,0 +1,182 @@
+import copy
+import hashlib
+import logging
+import re
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed for the semantic cache
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Words learners add that do not change what needs correcting
+FILLER_WORDS = frozenset({
+    "um", "umm", "uh", "er", "erm", "hmm", "ah", "oh",
+    "well", "so", "like", "just", "actually", "basically", "ok", "okay"
+})
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def content_signature(text: str) -> str:
+    """Lowercased words without punctuation and filler words"""
+    return " ".join(
+        word for word in _WORD_PATTERN.findall(text.lower())
+        if word not in FILLER_WORDS
+    )
+
+
+def _scope_id(scope: str) -> int:
+    return int.from_bytes(hashlib.sha256(scope.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache over prompt embeddings
+
+    Vectors live in a preallocated NumPy matrix; a lookup is one matrix-vector
+    product over the entries in the same scope (endpoint and generation
+    settings). Entries are evicted least recently used first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86400.0
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            max_entries: Maximum number of cached answers
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Time after which an entry expires (0 disables)
+        """
+        if np is None:
+            raise ImportError("Semantic cache requires the 'numpy' package")
+
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+        # Allocated on the first insert, once the embedding size is known
+        self._vectors: Optional["np.ndarray"] = None
+        self._scopes = np.zeros(max_entries, dtype=np.int64)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._stored_at = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._signatures: List[Optional[str]] = [None] * max_entries
+        self._size = 0
+        self._clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.guard_rejections = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> "np.ndarray":
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(
+        self,
+        scope: str,
+        vector: List[float],
+        guard: Optional[Callable[[Dict[str, Any], Optional[str]], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached answer for the most similar prompt in a scope
+
+        Args:
+            scope: Endpoint and settings the answer depends on
+            vector: Prompt embedding
+            guard: If given, called with the cached answer and the signature
+                stored with it; a hit is only served if it returns True
+
+        Returns:
+            Copy of the cached answer, or None on a miss
+        """
+        if self._size == 0 or self._vectors is None or len(vector) != self._vectors.shape[1]:
+            self.misses += 1
+            return None
+
+        scores = self._vectors[:self._size] @ self._normalize(vector)
+        valid = self._scopes[:self._size] == _scope_id(scope)
+        if self.ttl_seconds > 0:
+            valid &= self._stored_at[:self._size] >= time.time() - self.ttl_seconds
+        scores = np.where(valid, scores, -np.inf)
+
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        value = copy.deepcopy(self._values[best])
+        if guard is not None and not guard(value, self._signatures[best]):
+            self.guard_rejections += 1
+            self.misses += 1
+            return None
+
+        self._last_used[best] = self._tick()
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        scope: str,
+        vector: List[float],
+        value: Dict[str, Any],
+        signature: Optional[str] = None
+    ):
+        """Store an answer for a prompt embedding, evicting the LRU entry if full"""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+        elif len(vector) != self._vectors.shape[1]:
+            logger.warning("Embedding size changed, clearing semantic cache")
+            self.clear()
+            self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+
+        if self._size < self.max_entries:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = int(np.argmin(self._last_used))
+            self.evictions += 1
+
+        self._vectors[slot] = self._normalize(vector)
+        self._scopes[slot] = _scope_id(scope)
+        self._last_used[slot] = self._tick()
+        self._stored_at[slot] = time.time()
+        self._values[slot] = copy.deepcopy(value)
+        self._signatures[slot] = signature
+
+    def clear(self):
+        """Remove all entries"""
+        self._vectors = None
+        self._values = [None] * self.max_entries
+        self._signatures = [None] * self.max_entries
+        self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get occupancy and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "dimensions": self._vectors.shape[1] if self._vectors is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "guard_rejections": self.guard_rejections,
+            "evictions": self.evictions
+        }
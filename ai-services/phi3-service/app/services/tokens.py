@@ -0,0 +1,60 @@
+import re
+from functools import lru_cache
+from typing import List, Dict
+
+# Words, numbers and single punctuation marks
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Approximate the number of BPE tokens in a text
+
+    Short words are usually one token; longer ones split roughly every
+    four characters. Results are cached per text, so each message is
+    only counted once across turns.
+    """
+    return sum(1 + (len(piece) - 1) // 4 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    """Approximate the prompt tokens used by one chat message"""
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def trim_to_token_budget(messages: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+    """
+    Keep the newest messages that fit in a prompt token budget
+
+    Leading system messages (the system prompt and any conversation
+    summary) are always kept, and so is the newest message even if it
+    alone exceeds the budget.
+
+    Args:
+        messages: Conversation messages, system prompt first
+        budget: Maximum prompt tokens
+
+    Returns:
+        Trimmed list of messages
+    """
+    pinned = 1
+    while pinned < len(messages) - 1 and messages[pinned].get("role") == "system":
+        pinned += 1
+    if len(messages) <= pinned:
+        return messages
+
+    system_msgs, history = messages[:pinned], messages[pinned:]
+    remaining = budget - sum(count_message_tokens(m) for m in system_msgs)
+
+    kept = 0
+    for message in reversed(history):
+        remaining -= count_message_tokens(message)
+        if remaining < 0 and kept:
+            break
+        kept += 1
+
+    return system_msgs + history[-kept:]
@@ -0,0 +1,150 @@
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Ollama reports durations in nanoseconds
+_NS_PER_MS = 1_000_000
+
+
+def extract_usage(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Read token counts and timings from a final Ollama /api/chat response
+
+    Args:
+        result: Parsed Ollama response (or the last stream chunk)
+
+    Returns:
+        Usage dictionary, or None if Ollama did not report counts
+    """
+    if "eval_count" not in result and "prompt_eval_count" not in result:
+        return None
+
+    # prompt_eval_count is omitted when the whole prompt came from Ollama's cache
+    prompt_tokens = result.get("prompt_eval_count", 0)
+    completion_tokens = result.get("eval_count", 0)
+    eval_ms = result.get("eval_duration", 0) / _NS_PER_MS
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_eval_ms": round(result.get("prompt_eval_duration", 0) / _NS_PER_MS, 2),
+        "eval_ms": round(eval_ms, 2),
+        "load_ms": round(result.get("load_duration", 0) / _NS_PER_MS, 2),
+        "total_ms": round(result.get("total_duration", 0) / _NS_PER_MS, 2),
+        "tokens_per_second": round(completion_tokens / eval_ms * 1000, 2) if eval_ms else None
+    }
+
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+class _OperationStats:
+    """Running totals for one kind of generation"""
+
+    def __init__(self, window: int):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.prompt_eval_ms = 0.0
+        self.eval_ms = 0.0
+        self.load_ms = 0.0
+        # Generations aborted before completion (e.g. the client disconnected)
+        self.cancelled = 0
+        # End-to-end latency of the most recent requests, queue wait included
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        generation_ms = self.prompt_eval_ms + self.eval_ms
+        return {
+            "requests": self.requests,
+            "cancelled": self.cancelled,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            "avg_completion_tokens": round(self.completion_tokens / self.requests, 1) if self.requests else 0.0,
+            "prompt_tokens_per_second": (
+                round(self.prompt_tokens / self.prompt_eval_ms * 1000, 2) if self.prompt_eval_ms else None
+            ),
+            "generation_tokens_per_second": (
+                round(self.completion_tokens / self.eval_ms * 1000, 2) if self.eval_ms else None
+            ),
+            "prompt_eval_seconds": round(self.prompt_eval_ms / 1000, 3),
+            "generation_seconds": round(self.eval_ms / 1000, 3),
+            "load_seconds": round(self.load_ms / 1000, 3),
+            "prompt_eval_share": round(self.prompt_eval_ms / generation_ms, 4) if generation_ms else None,
+            "latency_ms": {
+                "samples": len(ordered),
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+                "max": round(ordered[-1], 2) if ordered else None
+            }
+        }
+
+
+class UsageMetrics:
+    """Aggregate token usage, generation speed and latency per operation"""
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize usage metrics
+
+        Args:
+            window: Number of recent requests used for latency percentiles
+        """
+        self.window = window
+        self._operations: Dict[str, _OperationStats] = {}
+
+    def _operation(self, operation: str) -> _OperationStats:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = _OperationStats(self.window)
+        return stats
+
+    def record(self, operation: str, usage: Optional[Dict[str, Any]], latency_ms: float):
+        """
+        Record one completed generation
+
+        Args:
+            operation: Kind of request, e.g. chat or correction
+            usage: Usage dictionary from extract_usage(), if available
+            latency_ms: End-to-end latency in milliseconds
+        """
+        stats = self._operation(operation)
+        stats.requests += 1
+        stats.latencies.append(latency_ms)
+        if usage:
+            stats.prompt_tokens += usage["prompt_tokens"]
+            stats.completion_tokens += usage["completion_tokens"]
+            stats.prompt_eval_ms += usage["prompt_eval_ms"]
+            stats.eval_ms += usage["eval_ms"]
+            stats.load_ms += usage["load_ms"]
+
+    def record_cancellation(self, operation: str):
+        """Record a generation that was aborted before it completed"""
+        self._operation(operation).cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get aggregates per operation and across all operations"""
+        total = _OperationStats(self.window * max(1, len(self._operations)))
+        for stats in self._operations.values():
+            total.requests += stats.requests
+            total.cancelled += stats.cancelled
+            total.prompt_tokens += stats.prompt_tokens
+            total.completion_tokens += stats.completion_tokens
+            total.prompt_eval_ms += stats.prompt_eval_ms
+            total.eval_ms += stats.eval_ms
+            total.load_ms += stats.load_ms
+            total.latencies.extend(stats.latencies)
+
+        return {
+            "latency_window": self.window,
+            "total": total.snapshot(),
+            "operations": {name: stats.snapshot() for name, stats in self._operations.items()}
+        }
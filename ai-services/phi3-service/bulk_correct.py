@@ -0,0 +1,79 @@
+"""Offline bulk correction of a JSONL file through Phi3Service"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Correct every text in a JSONL file. Each input line is an object "
+                    "with a \"text\" field and optional \"id\", \"target_language\", "
+                    "\"provide_explanation\" and \"include_corrections\" fields."
+    )
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output JSONL file (one row per input line)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.ckpt)")
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help="Corrections in flight (default: scheduler capacity across all backends)"
+    )
+    parser.add_argument("--target-language", default="en", help="Default target language")
+    parser.add_argument("--no-explanation", action="store_true", help="Skip explanations by default")
+    parser.add_argument("--retries", type=int, default=2, help="Retries for overloaded requests")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0, help="Seconds between checkpoints")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between progress reports")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> dict:
+    from app.core import get_settings
+    from app.services import create_phi3_service
+    from app.services.bulk_runner import BulkCorrectionRunner
+    
+    settings = get_settings()
+    checkpoint = args.checkpoint or f"{args.output}.ckpt"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    
+    service = create_phi3_service(settings)
+    await service.start()
+    try:
+        runner = BulkCorrectionRunner(
+            service,
+            input_path=args.input,
+            output_path=args.output,
+            checkpoint_path=checkpoint,
+            concurrency=args.concurrency or service.scheduler.max_concurrent,
+            retries=args.retries,
+            checkpoint_interval=args.checkpoint_interval,
+            report_interval=args.report_interval,
+            defaults={
+                "target_language": args.target_language,
+                "provide_explanation": not args.no_explanation
+            }
+        )
+        return await runner.run()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        summary = asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume from the checkpoint", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(summary, indent=2))
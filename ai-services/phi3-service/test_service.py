@@ -53,6 +53,24 @@ def test_chat():
         print(f"Error: {response.text}")
     print()
 
+def test_chat_stream():
+    """Test streaming chat endpoint"""
+    print("Testing chat stream endpoint...")
+    data = {"message": "Tell me a short sentence in past tense."}
+    with requests.post(f"{BASE_URL}/api/v1/llm/chat/stream", json=data, stream=True) as response:
+        print(f"Status: {response.status_code}")
+        print("Assistant: ", end="", flush=True)
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                print(f"\nError: {chunk['error']}")
+                break
+            print(chunk.get("delta", ""), end="", flush=True)
+    print()
+    print()
+
 def test_correct():
     """Test correction endpoint"""
     print("Testing correction endpoint...")
@@ -77,6 +95,30 @@ def test_correct():
         print(f"Error: {response.text}")
     print()
 
+def test_correct_batch():
+    """Test batch correction endpoint"""
+    print("Testing batch correction endpoint...")
+    data = {
+        "items": [
+            {"text": "I goed to the store yesterday.", "target_language": "en"},
+            {"text": "She dont like apples.", "target_language": "en", "provide_explanation": False}
+        ]
+    }
+    response = requests.post(f"{BASE_URL}/api/v1/llm/correct/batch", json=data)
+    print(f"Status: {response.status_code}")
+    
+    if response.status_code == 200:
+        result = response.json()
+        print(f"Succeeded: {result['succeeded']}, Failed: {result['failed']}")
+        for item in result['results']:
+            if item['result']:
+                print(f"  [{item['index']}] {item['result']['corrected_text']}")
+            else:
+                print(f"  [{item['index']}] Error: {item['error']}")
+    else:
+        print(f"Error: {response.text}")
+    print()
+
 if __name__ == "__main__":
     print("="*50)
     print("Phi3 Service Test")
@@ -87,7 +129,9 @@ if __name__ == "__main__":
         test_health()
         test_info()
         test_chat()
+        test_chat_stream()
         test_correct()
+        test_correct_batch()
         print("✓ All tests completed!")
     except requests.exceptions.ConnectionError:
         print("✗ Error: Could not connect to service. Make sure it's running on port 8003")
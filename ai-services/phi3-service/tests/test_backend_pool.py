@@ -0,0 +1,73 @@
+"""Circuit breaking in BackendPool (no Ollama needed)"""
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+from app.services.backend_pool import BackendPool, BackendUnavailableError
+
+
+def server_error() -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://ollama/api/chat")
+    return httpx.HTTPStatusError(
+        "500", request=request, response=httpx.Response(500, request=request)
+    )
+
+
+class BackendPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = mock.AsyncMock()
+        self.client.get.return_value = httpx.Response(200, json={"models": []})
+        self.pool = BackendPool(
+            ["http://ollama"], client=self.client,
+            failure_threshold=2, circuit_reset_seconds=30.0
+        )
+        self.backend = self.pool.primary
+
+    async def _fail(self):
+        with self.assertRaises(httpx.HTTPStatusError):
+            async with self.pool.acquire():
+                raise server_error()
+
+    def _expire_circuit(self):
+        self.backend.circuit_open_until = time.monotonic() - 1
+
+    async def test_probe_does_not_close_open_circuit(self):
+        await self._fail()
+        await self._fail()
+        self.assertEqual(self.backend.circuit_state(time.monotonic()), "open")
+
+        self.assertTrue(await self.pool.probe(self.backend))
+
+        self.assertEqual(self.backend.circuit_state(time.monotonic()), "open")
+        with self.assertRaises(BackendUnavailableError):
+            self.pool.choose()
+
+    async def test_half_open_admits_one_trial(self):
+        await self._fail()
+        await self._fail()
+        self._expire_circuit()
+
+        async with self.pool.acquire() as backend:
+            self.assertIs(backend, self.backend)
+            with self.assertRaises(BackendUnavailableError):
+                self.pool.choose()
+
+        # The trial succeeded, so the circuit is closed again
+        self.assertEqual(self.backend.circuit_state(time.monotonic()), "closed")
+        self.assertIs(self.pool.choose(), self.backend)
+
+    async def test_failed_trial_reopens_circuit(self):
+        await self._fail()
+        await self._fail()
+        self._expire_circuit()
+
+        await self._fail()
+
+        self.assertEqual(self.backend.circuit_state(time.monotonic()), "open")
+        self.assertFalse(self.backend.trial_in_flight)
+
+
+if __name__ == "__main__":
+    unittest.main()
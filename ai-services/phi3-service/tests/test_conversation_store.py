@@ -0,0 +1,149 @@
+"""Persistent conversation stores (temp SQLite file, fakeredis for Redis)"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.services.conversation_store import RedisConversationStore, SQLiteConversationStore
+
+try:
+    import fakeredis
+except ImportError:  # Optional, only needed for the Redis tests
+    fakeredis = None
+
+
+def messages(text: str):
+    return [{"role": "user", "content": text}]
+
+
+class StoreBehaviour:
+    """Checks shared by every persistent backend; subclasses build the store"""
+
+    def make_store(self, max_entries: int = 3, ttl_seconds: float = 60.0):
+        raise NotImplementedError
+
+    def tearDown(self):
+        self.store.close()
+
+    def _set_in_order(self, *ids):
+        for conversation_id in ids:
+            self.store.set(conversation_id, messages(conversation_id))
+            # Distinct last access times, so LRU order is well defined
+            time.sleep(0.01)
+
+    def test_get_set_delete(self):
+        self.store = self.make_store()
+        self.store.set("a", messages("hello"))
+
+        self.assertEqual(self.store.get("a"), messages("hello"))
+        self.assertIn("a", self.store)
+        self.assertTrue(self.store.delete("a"))
+        self.assertIsNone(self.store.get("a"))
+        self.assertFalse(self.store.delete("a"))
+
+    def test_evicts_least_recently_used(self):
+        self.store = self.make_store(max_entries=2)
+        self._set_in_order("a", "b")
+        # Reading "a" makes "b" the least recently used
+        self.store.get("a")
+        time.sleep(0.01)
+        self.store.set("c", messages("c"))
+
+        self.assertIsNotNone(self.store.get("a"))
+        self.assertIsNone(self.store.get("b"))
+        self.assertIsNotNone(self.store.get("c"))
+        self.assertEqual(self.store.evictions, 1)
+        self.assertEqual(len(self.store), 2)
+
+    def test_sweep_expires_idle_conversations(self):
+        self.store = self.make_store(ttl_seconds=60.0)
+        self._set_in_order("a", "b")
+
+        later = time.time() + 120
+        with mock.patch("app.services.conversation_store.time.time", return_value=later):
+            self.assertEqual(self.store.sweep(), 2)
+
+        self.assertEqual(self.store.expirations, 2)
+        self.assertEqual(len(self.store), 0)
+
+    def test_stats_snapshot_is_refreshed_by_sweep(self):
+        self.store = self.make_store()
+        self._set_in_order("a", "b")
+
+        self.store.sweep()
+        stats = self.store.stats()
+
+        self.assertEqual(stats["entries"], 2)
+        self.assertGreater(stats["estimated_bytes"], 0)
+        self.assertIsNotNone(stats["as_of"])
+
+
+class AsyncStoreBehaviour:
+    """aget/aset/adelete must run blocking backends off the event loop"""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    async def asyncTearDown(self):
+        self.store.close()
+
+    async def test_async_calls_run_on_worker_thread(self):
+        self.store = self.make_store()
+        threads = []
+        for name in ("get", "set", "delete"):
+            method = getattr(self.store, name)
+
+            def record(*args, _method=method):
+                threads.append(threading.get_ident())
+                return _method(*args)
+
+            setattr(self.store, name, record)
+
+        await self.store.aset("a", messages("hello"))
+        self.assertEqual(await self.store.aget("a"), messages("hello"))
+        self.assertTrue(await self.store.adelete("a"))
+
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
+
+
+class SQLiteStoreTest(StoreBehaviour, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def make_store(self, max_entries: int = 3, ttl_seconds: float = 60.0):
+        return SQLiteConversationStore(
+            path=os.path.join(self.tmp.name, "conversations.db"),
+            max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+
+
+class SQLiteAsyncStoreTest(AsyncStoreBehaviour, unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def make_store(self):
+        return SQLiteConversationStore(path=os.path.join(self.tmp.name, "conversations.db"))
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisStoreTest(StoreBehaviour, unittest.TestCase):
+    def make_store(self, max_entries: int = 3, ttl_seconds: float = 60.0):
+        return RedisConversationStore(
+            max_entries=max_entries, ttl_seconds=ttl_seconds,
+            client=fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        )
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisAsyncStoreTest(AsyncStoreBehaviour, unittest.IsolatedAsyncioTestCase):
+    def make_store(self):
+        return RedisConversationStore(client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+
+if __name__ == "__main__":
+    unittest.main()
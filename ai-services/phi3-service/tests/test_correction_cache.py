@@ -0,0 +1,117 @@
+"""Correction caching in Phi3Service (no Ollama needed)"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.services import Phi3Service, CorrectionCache
+
+VALID_REPLY = json.dumps({
+    "corrected_text": "I went home.",
+    "corrections": [{"original": "goed", "corrected": "went"}],
+    "explanation": "Irregular past tense."
+})
+
+# A reply that ignores the schema; the text parser finds no correction in it
+DRIFTED_REPLY = "Sure! Let me help you with that sentence."
+
+
+class CorrectionCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.object(Phi3Service, "_check_ollama"):
+            self.service = Phi3Service(
+                preload_model=False,
+                correction_cache=CorrectionCache(max_entries=16)
+            )
+        self.replies = []
+        self.service._post_chat = mock.AsyncMock(side_effect=self._reply)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def _reply(self, payload, *args, **kwargs):
+        return {"message": {"role": "assistant", "content": self.replies.pop(0)}}
+
+    async def test_parsed_result_is_cached(self):
+        self.replies = [VALID_REPLY]
+
+        first = await self.service.correct_text("I goed home.")
+        second = await self.service.correct_text("I goed home.")
+
+        self.assertEqual(first["parse_mode"], "json")
+        self.assertEqual(second["corrected_text"], "I went home.")
+        self.assertEqual(self.service._post_chat.await_count, 1)
+
+    async def test_fallback_result_is_not_cached(self):
+        self.replies = [DRIFTED_REPLY, VALID_REPLY]
+
+        first = await self.service.correct_text("I goed home.")
+        retry = await self.service.correct_text("I goed home.")
+
+        self.assertEqual(first["parse_mode"], "fallback")
+        self.assertEqual(retry["parse_mode"], "json")
+        self.assertEqual(retry["corrected_text"], "I went home.")
+        self.assertEqual(self.service._post_chat.await_count, 2)
+
+
+class DiskTierTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "corrections.db")
+        self.cache = CorrectionCache(max_entries=2, disk_path=self.path, disk_max_entries=3)
+
+    async def asyncTearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _rows(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+
+    async def test_disk_queries_run_off_the_event_loop(self):
+        threads = []
+        execute = self.cache._conn.execute
+
+        def record(*args):
+            threads.append(threading.get_ident())
+            return execute(*args)
+
+        self.cache._conn = mock.Mock(wraps=self.cache._conn, execute=record)
+        await self.cache.aset("a", {"corrected_text": "A"})
+        self.cache._entries.clear()
+
+        self.assertEqual(await self.cache.aget("a"), {"corrected_text": "A"})
+        self.assertEqual(self.cache.disk_hits, 1)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_sweep_bounds_the_disk_tier(self):
+        for key in "abcde":
+            await self.cache.aset(key, {"corrected_text": key})
+
+        self.assertEqual(await self.cache._call(self.cache.sweep), 2)
+        self.assertEqual(self._rows(), 3)
+        self.cache._entries.clear()
+        self.assertIsNone(await self.cache.aget("a"))
+        self.assertIsNotNone(await self.cache.aget("e"))
+
+    async def test_sweep_removes_expired_rows(self):
+        self.cache.ttl_seconds = 60
+        await self.cache.aset("old", {"corrected_text": "old"})
+        await self.cache.aset("new", {"corrected_text": "new"})
+        await self.cache._call(
+            self.cache._conn.execute,
+            "UPDATE corrections SET stored_at = ? WHERE key = 'old'", (time.time() - 120,)
+        )
+
+        self.assertEqual(await self.cache._call(self.cache.sweep), 1)
+        self.assertEqual(self.cache.disk_expirations, 1)
+        self.assertEqual(self._rows(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
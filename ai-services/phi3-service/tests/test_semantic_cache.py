@@ -0,0 +1,123 @@
+"""Near-duplicate correction hits in Phi3Service (no Ollama needed)"""
+import json
+import unittest
+from unittest import mock
+
+from app.services import Phi3Service, SemanticCache
+
+REPLY = json.dumps({
+    "corrected_text": "Um, I went home.",
+    "corrections": [{"original": "goed", "corrected": "went"}],
+    "explanation": "Irregular past tense."
+})
+
+ARTICLE_REPLY = json.dumps({
+    "corrected_text": "I have an apple.",
+    "corrections": [
+        {"original": "has", "corrected": "have"},
+        {"original": "a", "corrected": "an"}
+    ],
+    "explanation": "Use 'have' with 'I' and 'an' before a vowel."
+})
+
+NO_MISTAKES_REPLY = json.dumps({
+    "corrected_text": "I went home.",
+    "corrections": [],
+    "explanation": ""
+})
+
+
+class SemanticCorrectionTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.object(Phi3Service, "_check_ollama"):
+            self.service = Phi3Service(
+                preload_model=False,
+                semantic_cache=SemanticCache(max_entries=16, threshold=0.9)
+            )
+        self.replies = []
+        self.service._post_chat = mock.AsyncMock(side_effect=self._reply)
+        # Every text embeds to the same vector, so only the guard decides
+        self.service._embed = mock.AsyncMock(return_value=[1.0, 0.0, 0.0])
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def _reply(self, payload, *args, **kwargs):
+        return {"message": {"role": "assistant", "content": self.replies.pop(0)}}
+
+    async def test_hit_applies_cached_corrections_to_new_text(self):
+        self.replies = [REPLY]
+        await self.service.correct_text("Um, I goed home.")
+
+        result = await self.service.correct_text("i goed home!")
+
+        self.assertEqual(self.service._post_chat.await_count, 1)
+        self.assertEqual(result["original_text"], "i goed home!")
+        self.assertEqual(result["corrected_text"], "i went home!")
+
+    async def test_hit_rejected_when_other_words_differ(self):
+        self.replies = [ARTICLE_REPLY, ARTICLE_REPLY]
+        await self.service.correct_text("I has a apple.")
+
+        await self.service.correct_text("I has a banana.")
+
+        self.assertEqual(self.service._post_chat.await_count, 2)
+        self.assertEqual(self.service.semantic_cache.guard_rejections, 1)
+
+    async def test_hit_rejected_when_new_text_adds_a_mistake(self):
+        self.replies = [REPLY, REPLY]
+        await self.service.correct_text("I goed home.")
+
+        await self.service.correct_text("I goed home yesterdy.")
+
+        self.assertEqual(self.service._post_chat.await_count, 2)
+        self.assertEqual(self.service.semantic_cache.guard_rejections, 1)
+
+    async def test_hit_rejected_when_span_is_missing(self):
+        self.replies = [REPLY, REPLY]
+        await self.service.correct_text("Um, I goed home.")
+
+        await self.service.correct_text("I go home.")
+
+        self.assertEqual(self.service._post_chat.await_count, 2)
+        self.assertEqual(self.service.semantic_cache.guard_rejections, 1)
+
+    async def test_result_without_spans_needs_same_content_words(self):
+        self.replies = [NO_MISTAKES_REPLY, REPLY]
+        await self.service.correct_text("I went home.")
+
+        same_words = await self.service.correct_text("well, i went home")
+        other_words = await self.service.correct_text("I goed home.")
+
+        self.assertEqual(same_words["corrections"], [])
+        self.assertEqual(other_words["corrected_text"], "Um, I went home.")
+        self.assertEqual(self.service._post_chat.await_count, 2)
+
+
+class SemanticChatTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.object(Phi3Service, "_check_ollama"):
+            self.service = Phi3Service(
+                preload_model=False,
+                semantic_cache=SemanticCache(max_entries=16, threshold=0.9)
+            )
+        self.service._post_chat = mock.AsyncMock(return_value={
+            "message": {"role": "assistant", "content": "Kutya."}
+        })
+        self.service._embed = mock.AsyncMock(return_value=[1.0, 0.0, 0.0])
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_first_turn_hit_needs_same_content_words(self):
+        await self.service.chat("How do I say 'dog' in Hungarian?")
+
+        await self.service.chat("how do I say 'dog' in Hungarian")
+        await self.service.chat("How do I say 'cat' in Hungarian?")
+
+        self.assertEqual(self.service._post_chat.await_count, 2)
+        self.assertEqual(self.service.semantic_cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
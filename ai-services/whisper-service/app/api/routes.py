@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional
+import json
 import logging
 
 from app.models import (
@@ -9,8 +11,15 @@ from app.models import (
     HealthResponse,
     ErrorResponse
 )
-from app.services import WhisperService
+from app.services import (
+    WhisperService,
+    TranscriptionPool,
+    PoolBusyError,
+    QueueFullError,
+    StreamingTranscriber
+)
 from app.core import get_settings
+from app.api.upload_limit import read_upload
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -18,6 +27,15 @@ router = APIRouter()
 # Global Whisper service instance (will be initialized on startup)
 whisper_service: WhisperService = None
 
+# Worker pool running transcriptions off the event loop
+transcription_pool: TranscriptionPool = None
+
+# Open WebSocket recognition streams
+active_streams = 0
+
+# WebSocket close code asking the client to retry later
+TRY_AGAIN_LATER = 1013
+
 
 def get_whisper_service() -> WhisperService:
     """Dependency to get Whisper service instance"""
@@ -26,13 +44,29 @@ def get_whisper_service() -> WhisperService:
     return whisper_service
 
 
+def get_transcription_pool() -> TranscriptionPool:
+    """Dependency to get the transcription worker pool"""
+    if transcription_pool is None:
+        raise HTTPException(status_code=503, detail="Whisper service not initialized")
+    return transcription_pool
+
+
+def _busy(e: PoolBusyError) -> HTTPException:
+    """Map a rejected transcription to 429 (queue full) or 503 (queue timeout)"""
+    return HTTPException(
+        status_code=429 if isinstance(e, QueueFullError) else 503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     file: UploadFile = File(..., description="Audio file to transcribe"),
     language: Optional[str] = Form(None, description="Language code (e.g., en, hu)"),
     task: str = Form("transcribe", description="Task: transcribe or translate"),
     return_segments: bool = Form(False, description="Return detailed segments"),
-    service: WhisperService = Depends(get_whisper_service)
+    pool: TranscriptionPool = Depends(get_transcription_pool)
 ):
     """
     Transcribe audio file to text
@@ -44,25 +78,18 @@ async def transcribe_audio(
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
-        # Read audio file
+        # Read audio file in chunks, stopping at the size limit
         logger.info(f"Received file: {file.filename}")
-        audio_bytes = await file.read()
-        
-        # Check file size
         settings = get_settings()
-        max_size = settings.max_audio_size_mb * 1024 * 1024
-        if len(audio_bytes) > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Max size: {settings.max_audio_size_mb}MB"
-            )
+        audio_bytes = await read_upload(file, settings.max_audio_size_mb * 1024 * 1024)
         
         # Use default language if not specified
         if not language:
             language = settings.default_language if settings.default_language else None
         
-        # Transcribe
-        result = service.transcribe_bytes(
+        # Transcribe on a worker so the event loop stays responsive
+        result = await pool.run(
+            "transcribe_bytes",
             audio_bytes=audio_bytes,
             filename=file.filename,
             language=language,
@@ -82,6 +109,11 @@ async def transcribe_audio(
         
         return response
         
+    except HTTPException:
+        raise
+    except PoolBusyError as e:
+        logger.warning(f"Transcription rejected: {e}")
+        raise _busy(e)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -90,8 +122,177 @@ async def transcribe_audio(
         raise HTTPException(status_code=500, detail="Transcription failed")
 
 
+def _format_event(event: Dict[str, Any], sse: bool) -> str:
+    """Serialize a stream event as an SSE event or an NDJSON line"""
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"data: {data}\n\n"
+    return data + "\n"
+
+
+@router.post("/transcribe/stream")
+async def transcribe_audio_stream(
+    http_request: Request,
+    file: UploadFile = File(..., description="Audio file to transcribe"),
+    language: Optional[str] = Form(None, description="Language code (e.g., en, hu)"),
+    task: str = Form("transcribe", description="Task: transcribe or translate"),
+    pool: TranscriptionPool = Depends(get_transcription_pool)
+):
+    """
+    Transcribe audio file to text, streaming segments as they are decoded
+    
+    Sends one "segment" event per segment and a final "summary" event with
+    the full text, language and duration. Responds with server-sent events
+    when the client accepts text/event-stream, otherwise with NDJSON.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    logger.info(f"Received file for streaming: {file.filename}")
+    settings = get_settings()
+    audio_bytes = await read_upload(file, settings.max_audio_size_mb * 1024 * 1024)
+    if not language:
+        language = settings.default_language if settings.default_language else None
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    events = pool.stream(
+        "transcribe_bytes_stream",
+        audio_bytes=audio_bytes,
+        filename=file.filename,
+        language=language,
+        task=task
+    )
+    
+    # Wait for a worker and the first event so rejections get a real status
+    try:
+        first_event = await events.__anext__()
+    except PoolBusyError as e:
+        logger.warning(f"Transcription rejected: {e}")
+        raise _busy(e)
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        raise HTTPException(status_code=500, detail="Transcription failed")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            yield _format_event(first_event, sse)
+            async for event in events:
+                yield _format_event(event, sse)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error(f"Transcription stream error: {e}")
+            yield _format_event({"type": "error", "detail": "Transcription failed"}, sse)
+        finally:
+            # Runs when the client disconnects too; stops the decode
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _control_type(text: Optional[str]) -> Optional[str]:
+    """Type of a JSON control message, or None if it is not one"""
+    try:
+        message = json.loads(text or "")
+    except ValueError:
+        return None
+    return message.get("type") if isinstance(message, dict) else None
+
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    language: Optional[str] = None,
+    task: str = "transcribe"
+):
+    """
+    Real-time transcription of a live recording
+    
+    The client sends 16 kHz mono 16-bit little-endian PCM as binary
+    messages and {"type": "end"} when it stops recording. The server sends
+    JSON events: partial, final (one per finalized segment),
+    end_of_utterance, error, and done after the end message.
+    """
+    global active_streams
+    settings = get_settings()
+    await websocket.accept()
+    
+    if transcription_pool is None or active_streams >= settings.stream_max_sessions:
+        await websocket.close(code=TRY_AGAIN_LATER, reason="Too many streams")
+        return
+    
+    if not language:
+        language = settings.default_language if settings.default_language else None
+    
+    async def decode(samples, wait):
+        return await transcription_pool.run(
+            "transcribe",
+            wait=wait,
+            audio=samples,
+            language=language,
+            task=task,
+            return_segments=True
+        )
+    
+    transcriber = StreamingTranscriber(
+        decode,
+        window_seconds=settings.stream_window_seconds,
+        partial_interval=settings.stream_partial_interval,
+        silence_seconds=settings.stream_silence_seconds,
+        vad_threshold=settings.stream_vad_threshold
+    )
+    active_streams += 1
+    logger.info(f"Stream opened ({active_streams} active)")
+    
+    try:
+        await websocket.send_json({"type": "ready", "sample_rate": 16000, "encoding": "pcm_s16le"})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                events = await transcriber.feed(message["bytes"])
+            elif _control_type(message.get("text")) == "end":
+                for event in await transcriber.flush():
+                    await websocket.send_json(event)
+                await websocket.send_json({"type": "done", "utterances": transcriber.utterances})
+                await websocket.close()
+                break
+            else:
+                events = [{"type": "error", "detail": "Expected PCM audio or {\"type\": \"end\"}"}]
+            
+            for event in events:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    except PoolBusyError as e:
+        logger.warning(f"Stream rejected: {e}")
+        await websocket.send_json({"type": "error", "detail": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=TRY_AGAIN_LATER)
+    except Exception as e:
+        logger.error(f"Stream error: {e}")
+        await websocket.send_json({"type": "error", "detail": "Transcription failed"})
+        await websocket.close(code=1011)
+    finally:
+        active_streams -= 1
+        logger.info(
+            f"Stream closed after {transcriber.segments_sent} segments "
+            f"({active_streams} active)"
+        )
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check(service: WhisperService = Depends(get_whisper_service)):
+async def health_check(
+    service: WhisperService = Depends(get_whisper_service),
+    pool: TranscriptionPool = Depends(get_transcription_pool)
+):
     """
     Check service health status
     """
@@ -100,11 +301,28 @@ async def health_check(service: WhisperService = Depends(get_whisper_service)):
     return HealthResponse(
         status="healthy",
         service=get_settings().service_name,
-        model_loaded=service.is_model_loaded(),
+        model_loaded=pool.is_ready(),
         model_name=model_info["model_name"]
     )
 
 
+@router.get("/info")
+async def get_info(
+    service: WhisperService = Depends(get_whisper_service),
+    pool: TranscriptionPool = Depends(get_transcription_pool)
+):
+    """
+    Get model information and worker pool state
+    """
+    return {
+        **service.get_model_info(),
+        # In process mode the model lives in the worker processes
+        "status": "loaded" if pool.is_ready() else "not_loaded",
+        "pool": pool.stats(),
+        "active_streams": active_streams
+    }
+
+
 @router.get("/models")
 async def list_models(service: WhisperService = Depends(get_whisper_service)):
     """
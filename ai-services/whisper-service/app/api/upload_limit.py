@@ -0,0 +1,90 @@
+import logging
+from typing import Iterable
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Allowance for multipart boundaries, headers and form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Bytes read from a spooled upload at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Max size: {max_bytes // (1024 * 1024)}MB"
+    )
+
+
+class UploadLimitMiddleware:
+    """
+    Reject oversized request bodies before they are buffered
+
+    Requests to the given path prefixes are refused with 413 straight away
+    when Content-Length is over the limit. Bodies without a usable
+    Content-Length (e.g. chunked uploads) are counted as they arrive and
+    parsing is aborted as soon as the limit is crossed.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        """
+        Initialize upload limit middleware
+
+        Args:
+            app: ASGI application to wrap
+            max_bytes: Maximum size of the uploaded file itself
+            paths: Path prefixes the limit applies to
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + MULTIPART_OVERHEAD
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.limit:
+            logger.warning(f"Rejected upload of {int(content_length)} bytes to {scope['path']}")
+            error = _too_large(self.max_bytes)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    logger.warning(f"Aborted upload to {scope['path']} after {received} bytes")
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an upload in chunks, stopping as soon as it exceeds max_bytes
+
+    Raises:
+        HTTPException: 413 if the file is larger than max_bytes
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise _too_large(max_bytes)
+        buffer += chunk
+    return bytes(buffer)
@@ -18,6 +18,19 @@ class Settings(BaseSettings):
     max_audio_size_mb: int = 25
     device: str = "cpu"  # cpu or cuda
     
+    # Transcription Worker Pool
+    transcription_executor: str = "thread"  # thread or process (one model copy per process)
+    transcription_workers: int = 1
+    transcription_max_queue: int = 8
+    transcription_queue_timeout: float = 30.0
+    
+    # Streaming Recognition (WebSocket)
+    stream_max_sessions: int = 4
+    stream_window_seconds: float = 20.0  # audio kept per stream; bounds its memory
+    stream_partial_interval: float = 1.0  # seconds of new audio between partial results
+    stream_silence_seconds: float = 0.7  # trailing silence that ends an utterance
+    stream_vad_threshold: float = 0.01  # RMS level treated as speech
+    
     # Logging
     log_level: str = "INFO"
     
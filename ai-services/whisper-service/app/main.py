@@ -5,7 +5,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core import get_settings
 from app.api import router
-from app.services import WhisperService
+from app.api.upload_limit import UploadLimitMiddleware
+from app.services import WhisperService, TranscriptionPool
 import app.api.routes as routes_module
 
 # Configure logging
@@ -25,10 +26,22 @@ async def lifespan(app: FastAPI):
     
     try:
         # Initialize Whisper service
+        process_mode = settings.transcription_executor == "process"
         routes_module.whisper_service = WhisperService(
             model_name=settings.whisper_model,
-            device=settings.device
+            device=settings.device,
+            num_workers=settings.transcription_workers,
+            # Worker processes load their own model
+            load_model=not process_mode
         )
+        routes_module.transcription_pool = TranscriptionPool(
+            routes_module.whisper_service,
+            mode=settings.transcription_executor,
+            max_workers=settings.transcription_workers,
+            max_queue=settings.transcription_max_queue,
+            queue_timeout=settings.transcription_queue_timeout
+        )
+        await routes_module.transcription_pool.start()
         logger.info("Whisper service initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Whisper service: {e}")
@@ -38,6 +51,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Whisper service...")
+    if routes_module.transcription_pool is not None:
+        routes_module.transcription_pool.shutdown()
 
 
 # Create FastAPI application
@@ -58,6 +73,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before they are read
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=settings.max_audio_size_mb * 1024 * 1024,
+    paths=["/api/v1/stt/transcribe"]
+)
+
 # Include routers
 app.include_router(router, prefix="/api/v1/stt", tags=["Speech-to-Text"])
 
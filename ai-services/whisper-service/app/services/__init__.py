@@ -1,3 +1,19 @@
 from .whisper_service import WhisperService
+from .transcription_pool import (
+    TranscriptionPool,
+    PoolBusyError,
+    QueueFullError,
+    QueueTimeoutError,
+    WorkersBusyError
+)
+from .streaming import StreamingTranscriber
 
-__all__ = ["WhisperService"]
+__all__ = [
+    "WhisperService",
+    "TranscriptionPool",
+    "PoolBusyError",
+    "QueueFullError",
+    "QueueTimeoutError",
+    "WorkersBusyError",
+    "StreamingTranscriber"
+]
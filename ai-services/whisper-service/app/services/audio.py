@@ -0,0 +1,51 @@
+import io
+import logging
+import wave
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sample rate Whisper models expect
+SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM samples to float32 in [-1, 1]"""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def frame_energy(samples: np.ndarray, frame_size: int = 480) -> np.ndarray:
+    """RMS level of consecutive frames (30 ms at 16 kHz by default)"""
+    count = len(samples) // frame_size
+    frames = samples[:count * frame_size].reshape(count, frame_size)
+    return np.sqrt(np.mean(np.square(frames), axis=1))
+
+
+def decode_pcm_wav(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode a 16 kHz mono 16-bit PCM WAV file without the general decoder
+
+    Args:
+        data: Complete WAV file contents
+
+    Returns:
+        Float32 samples, or None if the data is not in exactly that format
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if (
+                wav.getnchannels() != 1
+                or wav.getsampwidth() != 2
+                or wav.getframerate() != SAMPLE_RATE
+                or wav.getcomptype() != "NONE"
+            ):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        logger.debug(f"WAV fast path not applicable: {e}")
+        return None
+    return pcm16_to_float32(frames)
@@ -0,0 +1,198 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE, frame_energy, pcm16_to_float32
+from app.services.transcription_pool import PoolBusyError
+
+logger = logging.getLogger(__name__)
+
+# 30 ms VAD frames
+VAD_FRAME_SIZE = 480
+
+# Silence kept in front of speech so the first word is not clipped
+PREROLL_SECONDS = 0.3
+
+# decode(samples, wait): wait=False must fail with PoolBusyError instead of queueing
+Decoder = Callable[[np.ndarray, bool], Awaitable[Dict[str, Any]]]
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one live PCM stream
+
+    Audio is kept in a fixed-size window, which bounds the memory a stream
+    can use. While the speaker talks, the window is re-decoded every
+    partial_interval seconds of new audio and the text is sent as a partial
+    result. Once the energy-based VAD sees silence_seconds of silence after
+    speech, the utterance is decoded one last time, its segments are
+    finalized and the window is cleared. If the window fills up before a
+    pause, every segment except the last (possibly cut off) one is
+    finalized and the window slides forward to where that segment starts.
+    """
+
+    def __init__(
+        self,
+        decode: Decoder,
+        window_seconds: float = 20.0,
+        partial_interval: float = 1.0,
+        silence_seconds: float = 0.7,
+        vad_threshold: float = 0.01
+    ):
+        """
+        Initialize streaming transcriber
+
+        Args:
+            decode: Coroutine transcribing 16 kHz float32 samples with segments;
+                partials call it with wait=False so they never queue behind other work
+            window_seconds: Longest stretch of audio kept for decoding
+            partial_interval: Seconds of new audio between partial results (0 disables)
+            silence_seconds: Trailing silence that ends an utterance
+            vad_threshold: RMS level treated as speech
+        """
+        self.decode = decode
+        self.partial_interval = partial_interval
+        self.silence_seconds = silence_seconds
+        self.vad_threshold = vad_threshold
+
+        self._buffer = np.zeros(int(window_seconds * SAMPLE_RATE), dtype=np.float32)
+        self._length = 0
+        # Stream time (seconds) of the first sample in the buffer
+        self._offset = 0.0
+        # Odd trailing byte of a chunk that split a sample
+        self._remainder = b""
+        self._since_decode = 0
+        self._utterance_text: List[str] = []
+        self._utterance_start = None
+        self._utterance_end = None
+
+        self.segments_sent = 0
+        self.utterances = 0
+        self.partials_skipped = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._length / SAMPLE_RATE
+
+    async def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """
+        Add 16-bit little-endian mono PCM and run any decoding that is due
+
+        Returns:
+            Events to send to the client, in order
+        """
+        data = self._remainder + chunk
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        samples = pcm16_to_float32(data[:usable])
+
+        events: List[Dict[str, Any]] = []
+        while len(samples):
+            if self._length == len(self._buffer):
+                events += await self._slide_window()
+            take = min(len(samples), len(self._buffer) - self._length)
+            self._buffer[self._length:self._length + take] = samples[:take]
+            self._length += take
+            self._since_decode += take
+            samples = samples[take:]
+
+        energy = frame_energy(self._buffer[:self._length], VAD_FRAME_SIZE)
+        speech = np.flatnonzero(energy >= self.vad_threshold)
+        if not len(speech):
+            if self._utterance_text and self.buffered_seconds >= self.silence_seconds:
+                # Pause after a window slide: nothing left to decode
+                self._drop(self._length)
+                events += await self._finish_utterance()
+            elif not self._utterance_text:
+                self._drop(self._length - int(PREROLL_SECONDS * SAMPLE_RATE))
+            return events
+
+        trailing_silence = (len(energy) - 1 - speech[-1]) * VAD_FRAME_SIZE / SAMPLE_RATE
+        if trailing_silence >= self.silence_seconds:
+            events += await self._finish_utterance()
+        elif self.partial_interval > 0 and self._since_decode >= self.partial_interval * SAMPLE_RATE:
+            events += await self._partial()
+        return events
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """Finalize whatever is buffered (the client stopped sending)"""
+        return await self._finish_utterance()
+
+    def _drop(self, count: int):
+        """Discard the oldest count samples of the window"""
+        count = max(0, min(count, self._length))
+        if not count:
+            return
+        remaining = self._length - count
+        self._buffer[:remaining] = self._buffer[count:self._length]
+        self._length = remaining
+        self._offset += count / SAMPLE_RATE
+
+    async def _decode_window(self, wait: bool = True) -> List[Dict[str, Any]]:
+        self._since_decode = 0
+        # Copy, since the window keeps changing while a worker reads it
+        result = await self.decode(self._buffer[:self._length].copy(), wait)
+        return result.get("segments", [])
+
+    def _segment_event(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+        event = {
+            "type": "final",
+            "id": self.segments_sent,
+            "start": round(self._offset + segment["start"], 2),
+            "end": round(self._offset + segment["end"], 2),
+            "text": segment["text"]
+        }
+        self.segments_sent += 1
+        if self._utterance_start is None:
+            self._utterance_start = event["start"]
+        self._utterance_end = event["end"]
+        self._utterance_text.append(segment["text"])
+        return event
+
+    async def _partial(self) -> List[Dict[str, Any]]:
+        try:
+            segments = await self._decode_window(wait=False)
+        except PoolBusyError:
+            # Partials are best effort and skipped while every worker is
+            # busy, so they never stall the stream; the final decode still happens
+            self.partials_skipped += 1
+            return []
+        if not segments:
+            return []
+        return [{
+            "type": "partial",
+            "start": round(self._offset + segments[0]["start"], 2),
+            "end": round(self._offset + segments[-1]["end"], 2),
+            "text": " ".join(segment["text"] for segment in segments)
+        }]
+
+    async def _slide_window(self) -> List[Dict[str, Any]]:
+        """Finalize all but the last segment of a full window and move past them"""
+        segments = await self._decode_window()
+        keep_from = int(segments[-1]["start"] * SAMPLE_RATE) if len(segments) > 1 else self._length
+        if keep_from <= 0:
+            keep_from = self._length
+        finished = segments[:-1] if keep_from < self._length else segments
+        events = [self._segment_event(segment) for segment in finished]
+        self._drop(keep_from)
+        return events
+
+    async def _finish_utterance(self) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        if self._length:
+            segments = await self._decode_window()
+            events = [self._segment_event(segment) for segment in segments]
+            self._drop(self._length)
+
+        if self._utterance_text:
+            events.append({
+                "type": "end_of_utterance",
+                "start": self._utterance_start,
+                "end": self._utterance_end,
+                "text": " ".join(self._utterance_text)
+            })
+            self.utterances += 1
+        self._utterance_text = []
+        self._utterance_start = self._utterance_end = None
+        return events
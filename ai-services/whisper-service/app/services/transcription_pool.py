@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from app.services.whisper_service import WhisperService
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusyError(Exception):
+    """Raised when a transcription cannot be admitted"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(PoolBusyError):
+    """Raised when too many transcriptions are already waiting"""
+
+
+class QueueTimeoutError(PoolBusyError):
+    """Raised when a transcription waits longer than the queue timeout"""
+
+
+class WorkersBusyError(PoolBusyError):
+    """Raised when a caller that will not wait finds every worker busy"""
+
+
+# Marks the end of a streamed method's output
+_END = object()
+
+# Model owned by a worker process (process mode only)
+_worker_service: Optional[WhisperService] = None
+
+
+def _init_worker(model_name: str, device: str):
+    global _worker_service
+    _worker_service = WhisperService(model_name=model_name, device=device)
+
+
+def _call_worker(method: str, kwargs: Dict[str, Any]) -> Any:
+    return getattr(_worker_service, method)(**kwargs)
+
+
+def _collect_worker(method: str, kwargs: Dict[str, Any]) -> list:
+    # Generators cannot be sent back from a process, so they are drained here
+    return list(getattr(_worker_service, method)(**kwargs))
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+class TranscriptionPool:
+    """
+    Runs transcriptions off the event loop with bounded concurrency
+
+    In thread mode the shared WhisperService model is used from worker
+    threads (CTranslate2 releases the GIL while decoding). In process mode
+    every worker process loads its own copy of the model. At most
+    max_workers transcriptions run at once; up to max_queue more wait for
+    at most queue_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        service: WhisperService,
+        mode: str = "thread",
+        max_workers: int = 1,
+        max_queue: int = 8,
+        queue_timeout: float = 30.0
+    ):
+        """
+        Initialize transcription pool
+
+        Args:
+            service: Whisper service (its model is used directly in thread mode)
+            mode: "thread" or "process"
+            max_workers: Transcriptions running at once
+            max_queue: Transcriptions allowed to wait for a worker
+            queue_timeout: Seconds a transcription may wait before it is rejected
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown transcription pool mode: {mode}")
+
+        self.service = service
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._executor: Executor
+        if mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(service.model_name, service.device)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="whisper"
+            )
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._workers_ready = mode == "thread"
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Best-effort work turned away because no worker was free
+        self.declined = 0
+        self._total_wait = 0.0
+        # Exponential moving average of how long a transcription runs
+        self._avg_run_time = 5.0
+
+    async def start(self):
+        """Start worker processes and load their models (process mode)"""
+        if self.mode != "process":
+            return
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _worker_ready)
+            for _ in range(self.max_workers)
+        ))
+        self._workers_ready = True
+        logger.info(
+            f"Started {len(set(pids))} transcription worker process(es) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+
+    def is_ready(self) -> bool:
+        """Whether workers have a model loaded"""
+        if self.mode == "process":
+            return self._workers_ready
+        return self.service.is_model_loaded()
+
+    def _retry_after(self) -> int:
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(backlog * self._avg_run_time / self.max_workers))
+
+    def _submit(self, method: str, kwargs: Dict[str, Any]) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            return loop.run_in_executor(self._executor, _call_worker, method, kwargs)
+        fn: Callable[..., Any] = getattr(self.service, method)
+        return loop.run_in_executor(self._executor, lambda: fn(**kwargs))
+
+    async def _admit(self, wait: bool = True) -> float:
+        """Take a worker slot, waiting in the bounded queue if needed and allowed"""
+        enqueued_at = time.monotonic()
+        if not self._slots.locked():
+            # A free slot is taken without suspending, so no other request can race us
+            await self._slots.acquire()
+        elif not wait:
+            self.declined += 1
+            raise WorkersBusyError("No transcription worker is free", self._retry_after())
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError("Transcription queue is full", self._retry_after())
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise QueueTimeoutError(
+                    "Timed out waiting for a transcription worker",
+                    self._retry_after()
+                ) from None
+            finally:
+                self.waiting -= 1
+
+        started = time.monotonic()
+        self._total_wait += started - enqueued_at
+        self.in_flight += 1
+        return started
+
+    async def run(self, method: str, wait: bool = True, **kwargs) -> Any:
+        """
+        Run a WhisperService method on a worker
+
+        Args:
+            method: WhisperService method name, e.g. transcribe_bytes
+            wait: Queue for a worker if none is free (False fails immediately)
+            **kwargs: Arguments for the method (must be picklable in process mode)
+
+        Returns:
+            The method's return value
+
+        Raises:
+            WorkersBusyError: If wait is False and every worker is busy
+            QueueFullError: If max_queue transcriptions are already waiting
+            QueueTimeoutError: If no worker frees up within queue_timeout
+        """
+        started = await self._admit(wait)
+        try:
+            # A cancelled request cannot stop a running decode, so the slot
+            # stays taken until the worker actually finishes
+            future = self._submit(method, kwargs)
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(lambda _: self._finish(started, failed=True))
+            raise
+        except Exception:
+            self._finish(started, failed=True)
+            raise
+        self._finish(started, failed=False)
+        return result
+
+    async def stream(self, method: str, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run a WhisperService generator method on a worker, yielding its items
+
+        In thread mode every item is passed back as soon as the worker
+        produces it, and closing the stream makes the worker stop at the next
+        item. In process mode items arrive together once the worker is done.
+
+        Raises:
+            QueueFullError: If max_queue transcriptions are already waiting
+            QueueTimeoutError: If no worker frees up within queue_timeout
+        """
+        started = await self._admit()
+        loop = asyncio.get_running_loop()
+
+        if self.mode == "process":
+            try:
+                future = loop.run_in_executor(self._executor, _collect_worker, method, kwargs)
+                items = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                future.add_done_callback(lambda _: self._finish(started, failed=True))
+                raise
+            except Exception:
+                self._finish(started, failed=True)
+                raise
+            self._finish(started, failed=False)
+            for item in items:
+                yield item
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        fn: Callable[..., Any] = getattr(self.service, method)
+
+        def produce():
+            try:
+                for item in fn(**kwargs):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (_END, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (_END, None))
+
+        future = loop.run_in_executor(self._executor, produce)
+        failed = True
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is _END:
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+            failed = False
+        finally:
+            # The slot is freed once the worker has really stopped
+            stop.set()
+            future.add_done_callback(lambda _: self._finish(started, failed))
+
+    def _finish(self, started: float, failed: bool):
+        run_time = time.monotonic() - started
+        self._avg_run_time = 0.8 * self._avg_run_time + 0.2 * run_time
+        self.in_flight -= 1
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, in-flight count and counters"""
+        admitted = self.completed + self.failed + self.in_flight
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "declined": self.declined,
+            "avg_wait_ms": round(self._total_wait / admitted * 1000, 2) if admitted else 0.0,
+            "avg_run_ms": round(self._avg_run_time * 1000, 2)
+        }
+
+    def shutdown(self):
+        """Stop the workers, waiting for running transcriptions"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
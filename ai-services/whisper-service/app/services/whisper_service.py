@@ -1,9 +1,12 @@
 from faster_whisper import WhisperModel
+import io
 import logging
-import tempfile
 import os
-from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO, Iterator, Union
+
+import numpy as np
+
+from app.services.audio import decode_pcm_wav
 
 logger = logging.getLogger(__name__)
 
@@ -11,19 +14,29 @@ logger = logging.getLogger(__name__)
 class WhisperService:
     """Speech-to-Text service using Faster Whisper"""
     
-    def __init__(self, model_name: str = "base", device: str = "cpu"):
+    def __init__(
+        self,
+        model_name: str = "base",
+        device: str = "cpu",
+        num_workers: int = 1,
+        load_model: bool = True
+    ):
         """
         Initialize Whisper service
         
         Args:
             model_name: Whisper model name (tiny, base, small, medium, large)
             device: Device to run on (cpu or cuda)
+            num_workers: Parallel transcriptions the model serves from multiple threads
+            load_model: Load the model now (False when worker processes own the model)
         """
         self.model_name = model_name
         self.device = device
+        self.num_workers = num_workers
         self.compute_type = "int8" if device == "cpu" else "float16"
         self.model: Optional[WhisperModel] = None
-        self._load_model()
+        if load_model:
+            self._load_model()
     
     def _load_model(self):
         """Load the Faster Whisper model"""
@@ -32,7 +45,8 @@ class WhisperService:
             self.model = WhisperModel(
                 self.model_name,
                 device=self.device,
-                compute_type=self.compute_type
+                compute_type=self.compute_type,
+                num_workers=self.num_workers
             )
             logger.info("Faster-Whisper model loaded successfully")
         except Exception as e:
@@ -43,18 +57,43 @@ class WhisperService:
         """Check if the model is loaded"""
         return self.model is not None
     
+    def _decode(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        language: Optional[str],
+        task: str
+    ):
+        """Start decoding; segments are produced lazily as they are iterated"""
+        if not self.model:
+            raise ValueError("Whisper model not loaded")
+        
+        if isinstance(audio, str) and not os.path.exists(audio):
+            raise ValueError(f"Audio file not found: {audio}")
+        
+        logger.info(f"Transcribing audio: {audio if isinstance(audio, str) else type(audio).__name__}")
+        logger.info(f"Language: {language or 'auto-detect'}, Task: {task}")
+        
+        # Transcribe with Faster Whisper
+        return self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            vad_filter=True,  # Voice activity detection
+            beam_size=5
+        )
+    
     def transcribe(
         self,
-        audio_path: str,
+        audio: Union[str, BinaryIO, np.ndarray],
         language: Optional[str] = None,
         task: str = "transcribe",
         return_segments: bool = False
     ) -> Dict[str, Any]:
         """
-        Transcribe audio file using Faster Whisper
+        Transcribe audio using Faster Whisper
         
         Args:
-            audio_path: Path to audio file
+            audio: Path to an audio file, a file-like object, or 16 kHz mono float32 samples
             language: Language code (None for auto-detection)
             task: "transcribe" or "translate" (to English)
             return_segments: Whether to return detailed segments
@@ -65,24 +104,8 @@ class WhisperService:
         Raises:
             ValueError: If model is not loaded or audio file is invalid
         """
-        if not self.model:
-            raise ValueError("Whisper model not loaded")
-        
-        if not os.path.exists(audio_path):
-            raise ValueError(f"Audio file not found: {audio_path}")
-        
         try:
-            logger.info(f"Transcribing audio: {audio_path}")
-            logger.info(f"Language: {language or 'auto-detect'}, Task: {task}")
-            
-            # Transcribe with Faster Whisper
-            segments_iter, info = self.model.transcribe(
-                audio_path,
-                language=language,
-                task=task,
-                vad_filter=True,  # Voice activity detection
-                beam_size=5
-            )
+            segments_iter, info = self._decode(audio, language, task)
             
             # Convert iterator to list
             segments_list = list(segments_iter)
@@ -115,6 +138,50 @@ class WhisperService:
             logger.error(f"Transcription failed: {e}")
             raise
     
+    def transcribe_stream(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        language: Optional[str] = None,
+        task: str = "transcribe"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe audio, yielding each segment as soon as it is decoded
+        
+        Yields "segment" events followed by one "summary" event with the
+        full text, language and audio duration. Decoding only advances while
+        the generator is iterated, so closing it early stops the work.
+        
+        Args:
+            audio: Path to an audio file, a file-like object, or 16 kHz mono float32 samples
+            language: Language code (None for auto-detection)
+            task: "transcribe" or "translate" (to English)
+        """
+        segments_iter, info = self._decode(audio, language, task)
+        
+        texts: List[str] = []
+        for i, seg in enumerate(segments_iter):
+            text = seg.text.strip()
+            texts.append(text)
+            yield {"type": "segment", "id": i, "start": seg.start, "end": seg.end, "text": text}
+        
+        logger.info(f"Streamed transcription complete. Segments: {len(texts)}")
+        yield {
+            "type": "summary",
+            "text": " ".join(texts),
+            "language": info.language if hasattr(info, 'language') else (language or "unknown"),
+            "duration": getattr(info, "duration", None),
+            "segments": len(texts)
+        }
+    
+    @staticmethod
+    def _audio_from_bytes(audio_bytes: bytes, filename: str) -> Union[BinaryIO, np.ndarray]:
+        """Samples for 16 kHz mono PCM WAV, otherwise a buffer for the general decoder"""
+        samples = decode_pcm_wav(audio_bytes)
+        if samples is not None:
+            logger.info(f"Decoded {filename} via PCM WAV fast path")
+            return samples
+        return io.BytesIO(audio_bytes)
+    
     def transcribe_bytes(
         self,
         audio_bytes: bytes,
@@ -124,11 +191,14 @@ class WhisperService:
         return_segments: bool = False
     ) -> Dict[str, Any]:
         """
-        Transcribe audio from bytes
+        Transcribe audio from bytes, decoding it in memory
+        
+        16 kHz mono 16-bit PCM WAV is converted to samples directly; any
+        other format goes through the general decoder from a memory buffer.
         
         Args:
             audio_bytes: Audio file bytes
-            filename: Original filename (for extension)
+            filename: Original filename (for logging)
             language: Language code
             task: transcribe or translate
             return_segments: Return detailed segments
@@ -136,29 +206,26 @@ class WhisperService:
         Returns:
             Dictionary with transcription results
         """
-        # Get file extension
-        ext = Path(filename).suffix or ".wav"
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_path = tmp_file.name
-        
-        try:
-            # Transcribe
-            result = self.transcribe(
-                tmp_path,
-                language=language,
-                task=task,
-                return_segments=return_segments
-            )
-            return result
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(tmp_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file: {e}")
+        return self.transcribe(
+            self._audio_from_bytes(audio_bytes, filename),
+            language=language,
+            task=task,
+            return_segments=return_segments
+        )
+    
+    def transcribe_bytes_stream(
+        self,
+        audio_bytes: bytes,
+        filename: str,
+        language: Optional[str] = None,
+        task: str = "transcribe"
+    ) -> Iterator[Dict[str, Any]]:
+        """Streaming variant of transcribe_bytes (see transcribe_stream)"""
+        return self.transcribe_stream(
+            self._audio_from_bytes(audio_bytes, filename),
+            language=language,
+            task=task
+        )
     
     def get_available_models(self) -> list:
         """Get list of available Whisper models"""
@@ -0,0 +1,88 @@
+"""Partial results under a saturated TranscriptionPool (no model needed)"""
+import asyncio
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from app.services import StreamingTranscriber, TranscriptionPool, WorkersBusyError
+
+
+class BlockingService:
+    """Stands in for WhisperService; transcribe() blocks until released"""
+
+    model_name = "test"
+    device = "cpu"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def is_model_loaded(self) -> bool:
+        return True
+
+    def transcribe(self, audio=None, **kwargs):
+        self.release.wait(timeout=10)
+        return {"text": "hello", "language": "en", "segments": [
+            {"id": 0, "start": 0.0, "end": 1.0, "text": "hello"}
+        ]}
+
+
+def speech(seconds: float) -> bytes:
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2").tobytes()
+
+
+class SaturatedPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = BlockingService()
+        self.pool = TranscriptionPool(self.service, max_workers=1, queue_timeout=30.0)
+        # An upload occupies the only worker
+        self.upload = asyncio.create_task(self.pool.run("transcribe"))
+        await asyncio.sleep(0.05)
+
+    async def asyncTearDown(self):
+        self.service.release.set()
+        await self.upload
+        self.pool.shutdown()
+
+    async def test_run_without_wait_fails_fast(self):
+        started = time.monotonic()
+        with self.assertRaises(WorkersBusyError):
+            await self.pool.run("transcribe", wait=False)
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.pool.stats()["declined"], 1)
+        self.assertEqual(self.pool.stats()["queue_depth"], 0)
+
+    async def test_partial_is_skipped_instead_of_queued(self):
+        async def decode(samples, wait):
+            return await self.pool.run("transcribe", wait=wait, audio=samples)
+
+        transcriber = StreamingTranscriber(decode, partial_interval=1.0)
+
+        started = time.monotonic()
+        events = await transcriber.feed(speech(1.5))
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(events, [])
+        self.assertEqual(transcriber.partials_skipped, 1)
+
+    async def test_final_decode_waits_for_a_worker(self):
+        async def decode(samples, wait):
+            return await self.pool.run("transcribe", wait=wait, audio=samples)
+
+        transcriber = StreamingTranscriber(decode, partial_interval=0)
+        await transcriber.feed(speech(1.0))
+
+        flush = asyncio.create_task(transcriber.flush())
+        await asyncio.sleep(0.1)
+        self.assertFalse(flush.done())
+
+        self.service.release.set()
+        events = await flush
+        self.assertEqual([e["type"] for e in events], ["final", "end_of_utterance"])
+
+
+if __name__ == "__main__":
+    unittest.main()